@@ -1,20 +1,108 @@
 # scripts/combine_inputs.py
 
+import calendar
 import pandas as pd
 import os
 import sys
 
 
-def combine_processed_data():
+# The non-leap year to use for the final time series
+REPRESENTATIVE_YEAR = 2019
+
+# Columns holding the energy of each time step (kWh). While the sources are brought
+# to a common time step they are handled as energies per hour (mean powers); the
+# other columns (capacity factors, prices) are rates and are used as they are.
+ENERGY_COLUMNS = ['consumption_kwh', 'hydro_inflow_kwh']
+
+
+def infer_time_step(index):
+    """Returns the most common interval between consecutive timestamps of an index (pd.Timedelta)."""
+    timestamps = index.unique().sort_values()
+    return pd.Series(timestamps[1:] - timestamps[:-1]).mode().iloc[0]
+
+
+def to_time_step(df, step):
+    """
+    Brings the timeseries of one source to the time step of the model.
+
+    Finer data is averaged over each model step. Coarser data keeps its value over
+    each of its intervals, which preserves the energies; its gaps stay missing and
+    are interpolated with the other ones.
+
+    Args:
+        df (pd.DataFrame): Timeseries data of one source.
+        step (pd.Timedelta): Time step of the model.
+
+    Returns:
+        pd.DataFrame: The data at the model time step, with the `ENERGY_COLUMNS`
+                      as energies per hour (kWh/h).
+    """
+    source_step = infer_time_step(df.index)
+    df = df.sort_index()
+    energy_columns = [col for col in ENERGY_COLUMNS if col in df.columns]
+    df[energy_columns] = df[energy_columns] / (source_step / pd.Timedelta(hours=1))
+
+    if source_step < step:
+        df = df.resample(step).mean()
+    elif source_step > step:
+        df = df.resample(step).ffill(limit=int(source_step / step) - 1)
+    return df
+
+
+def normalize_to_year(df, year, how='first'):
+    """
+    Moves every timestamp of a dataframe to the same year, in a single vectorised step.
+
+    The month, day and time of day are kept. February 29th is dropped when `year`
+    is not a leap year; when `year` is a leap year and the data has no February
+    29th, that day is left missing (it is interpolated later).
+
+    Args:
+        df (pd.DataFrame): Timeseries data, possibly covering several years.
+        year (int): The target year.
+        how (str): How to merge the rows of different source years that fall on
+                   the same timestamp: 'first' keeps the first one in file order,
+                   'mean' averages them.
+
+    Returns:
+        pd.DataFrame: The data indexed by timestamps of `year`.
+    """
+    index = df.index
+    if not calendar.isleap(year):
+        leap_day = (index.month == 2) & (index.day == 29)
+        df, index = df[~leap_day], index[~leap_day]
+
+    # Rebuild the date in the target year, then add back the time of day.
+    dates = pd.to_datetime(pd.DataFrame({'year': year, 'month': index.month, 'day': index.day}))
+    df = df.set_axis(pd.DatetimeIndex(dates) + (index - index.normalize()), axis=0)
+
+    # Handle duplicates created by normalization (e.g., from multi-year records)
+    if how == 'mean':
+        return df.groupby(level=0, sort=False).mean()
+    return df[~df.index.duplicated(keep='first')]
+
+
+def combine_processed_data(representative_years=None, time_step=None):
     """
     Loads all individual processed timeseries data (renewables, consumption, hydro, price),
     normalizes their timestamps to a single representative year, combines them into a single
     DataFrame, cleans it (handles missing values), and saves the final model-ready CSV.
+
+    Args:
+        representative_years (list[int], optional): Years to produce, all from one
+            loading pass. Defaults to [REPRESENTATIVE_YEAR], saved as
+            'model_timeseries.csv'; with several years, each one is saved as
+            'model_timeseries_<year>.csv'.
+        time_step (str or pd.Timedelta, optional): Time step of the model data,
+            e.g. '15min' or '1h'. Defaults to the finest time step of the sources.
+
+    Returns:
+        list[str]: The paths of the files written.
     """
     print("--- Combining All Processed Data Sources ---")
 
-    # The non-leap year to use for the final time series
-    REPRESENTATIVE_YEAR = 2019
+    if representative_years is None:
+        representative_years = [REPRESENTATIVE_YEAR]
 
     # Define paths to the processed data files
     processed_dir = 'processed_data'
@@ -37,27 +125,42 @@ def combine_processed_data():
             print(f"Please run the corresponding processing script for '{name}' first.", file=sys.stderr)
             sys.exit(1)
 
+    # --- Choose and Validate the Time Step ---
+    source_steps = {name: infer_time_step(df.index) for name, df in dataframes.items()}
+    for name, source_step in source_steps.items():
+        print(f"Time step of '{name}': {source_step}")
+    step = pd.Timedelta(time_step) if time_step is not None else min(source_steps.values())
+    if step <= pd.Timedelta(0) or pd.Timedelta(days=1) % step:
+        print(f"ERROR: The time step must divide a day evenly, got {step}.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Time step of the model data: {step}")
+
+    output_paths = []
+    for year in representative_years:
+        output_paths.append(_combine_year(dataframes, year, step, single_output=len(representative_years) == 1))
+    return output_paths
+
+
+def _combine_year(dataframes, year, step, single_output=True):
+    """Combines the loaded dataframes into the model-ready file of one representative year."""
     # --- Normalize Timestamps to Representative Year ---
-    print(f"\nNormalizing all data to the representative year {REPRESENTATIVE_YEAR}...")
-    for name, df in dataframes.items():
-        # This mapping replaces the year of each timestamp with the representative year
-        df.index = df.index.map(lambda t: t.replace(year=REPRESENTATIVE_YEAR))
-        # Handle potential duplicates created by normalization (e.g., from leap years)
-        df = df[~df.index.duplicated(keep='first')]
-        dataframes[name] = df
+    print(f"\nNormalizing all data to the representative year {year}...")
+    normalized = [to_time_step(normalize_to_year(df, year), step) for df in dataframes.values()]
 
     # --- Combine into a Single DataFrame ---
     # `pd.concat` with axis=1 merges dataframes side-by-side based on their index
-    combined_df = pd.concat(dataframes.values(), axis=1)
+    combined_df = pd.concat(normalized, axis=1)
 
     # --- Clean the Final DataFrame ---
 
-    # 1. Create a full, continuous hourly index for the entire year
-    # This ensures the final dataframe has exactly 8760 hours without gaps.
+    # 1. Create a full, continuous index at the model time step for the entire year
+    # This ensures the final dataframe has no gaps (e.g. exactly 8760 hours, or
+    # 35040 quarter-hours, in a non-leap year).
     full_index = pd.date_range(
-        start=f'{REPRESENTATIVE_YEAR}-01-01 00:00:00',
-        end=f'{REPRESENTATIVE_YEAR}-12-31 23:00:00',
-        freq='h'
+        start=f'{year}-01-01 00:00:00',
+        end=f'{year + 1}-01-01 00:00:00',
+        freq=step,
+        inclusive='left'
     )
     combined_df = combined_df.reindex(full_index)
 
@@ -73,12 +176,17 @@ def combine_processed_data():
     print("\nChecking for missing values AFTER cleaning:")
     print(combined_df.isnull().sum())
 
+    # 3. Energies per hour back to energies per time step
+    energy_columns = [col for col in ENERGY_COLUMNS if col in combined_df.columns]
+    combined_df[energy_columns] = combined_df[energy_columns] * (step / pd.Timedelta(hours=1))
+
     # --- Save Final Model-Ready Data ---
-    output_path = 'model_timeseries.csv'
+    output_path = 'model_timeseries.csv' if single_output else f'model_timeseries_{year}.csv'
     combined_df.index.name = 'timestamp'  # Set the name for the index column
     combined_df.to_csv(output_path)
 
     print(f"\nSUCCESS: Final combined data saved to '{output_path}'.")
+    return output_path
 
 
 if __name__ == '__main__':
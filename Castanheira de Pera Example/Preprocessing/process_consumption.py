@@ -4,40 +4,52 @@ import pandas as pd
 import os
 import sys
 
-def process_consumption_data():
-    """
-    Loads raw hourly consumption data, cleans it, fills a known gap in the month
-    of October by replicating September's data, and saves it as a processed CSV file.
-    """
-    # Define file paths
-    raw_path = os.path.join('raw_data', 'consumos_horario_codigo_postal.csv')
-    processed_path = os.path.join('processed_data', 'processed_consumption.csv')
 
-    print("--- Processing Consumption Data ---")
+# Postal code of the community modelled (Castanheira de Pera)
+ZIP_CODE = '3280'
 
-    # Create the processed_data directory if it doesn't exist
-    os.makedirs('processed_data', exist_ok=True)
+# Number of rows of the raw export read at a time. The national e-redes exports
+# run to gigabytes, so they are never loaded in memory all at once.
+CHUNK_SIZE = 500_000
 
-    try:
-        # The raw data file uses a semicolon as a separator
-        df_consumption = pd.read_csv(raw_path, sep=';')
-        print(f"Successfully loaded raw data from '{raw_path}'.")
+# Columns of the raw export used by the model
+RAW_COLUMNS = ['Date/Time', 'Zip Code', 'Active Energy (kWh)']
 
-    except FileNotFoundError:
-        print(f"ERROR: Raw consumption data file not found at '{raw_path}'.", file=sys.stderr)
-        sys.exit(1)
 
-    # --- Data Cleaning and Formatting ---
+def read_consumption_chunks(raw_path, chunksize=CHUNK_SIZE):
+    """
+    Reads the raw e-redes export in chunks of `chunksize` rows.
+
+    Returns:
+        Iterator of pd.DataFrame: The used columns of each chunk, with the zip code as text.
+    """
+    # The raw data file uses a semicolon as a separator
+    return pd.read_csv(raw_path, sep=';', usecols=RAW_COLUMNS, dtype={'Zip Code': str},
+                       chunksize=chunksize)
 
+
+def clean_consumption_data(df_consumption):
+    """
+    Cleans the raw hourly consumption of one zip code and fills the known gap in
+    the month of October by replicating September's data.
+
+    Args:
+        df_consumption (pd.DataFrame): Raw rows with the 'Date/Time' and
+                                       'Active Energy (kWh)' columns.
+
+    Returns:
+        pd.DataFrame: The 'consumption_kwh' column, indexed by timestamp.
+    """
     # 1. Convert 'Date/Time' column to datetime objects.
     # Reading as UTC and then removing timezone is a safe way to standardize.
+    df_consumption = df_consumption.copy()
     df_consumption['timestamp'] = pd.to_datetime(df_consumption['Date/Time'], utc=True)
     df_consumption.set_index('timestamp', inplace=True)
     df_consumption.index = df_consumption.index.tz_localize(None) # Remove timezone info
 
     # 2. Select and rename the required column to a standard name
     df_consumption = df_consumption[['Active Energy (kWh)']]
-    df_consumption.rename(columns={'Active Energy (kWh)': 'consumption_kwh'}, inplace=True)
+    df_consumption = df_consumption.rename(columns={'Active Energy (kWh)': 'consumption_kwh'})
 
     # 3. Fill the missing October data by replicating September's data.
     # This is a specific cleaning step required for this particular dataset.
@@ -55,6 +67,113 @@ def process_consumption_data():
 
     # 4. Sort the index to ensure the data is in chronological order.
     df_complete.sort_index(inplace=True)
+    return df_complete
+
+
+def split_consumption_by_zip_code(raw_path, output_dir, zip_codes=None, chunksize=CHUNK_SIZE):
+    """
+    Streams the raw export and writes the raw rows of each zip code to its own file.
+
+    Only one chunk of the export is held in memory at a time.
+
+    Args:
+        raw_path (str): Path to the raw e-redes export.
+        output_dir (str): Directory of the per-zip-code files.
+        zip_codes (list[str], optional): Zip codes to keep. Defaults to all of them.
+        chunksize (int): Number of rows read at a time.
+
+    Returns:
+        dict: Maps each zip code found to the path of its raw file.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+
+    for i, chunk in enumerate(read_consumption_chunks(raw_path, chunksize)):
+        if zip_codes is not None:
+            chunk = chunk[chunk['Zip Code'].isin(zip_codes)]
+
+        for zip_code, rows in chunk.groupby('Zip Code'):
+            path = paths.get(zip_code)
+            if path is None:
+                # First rows of this zip code: (over)write the file with a header.
+                path = os.path.join(output_dir, f'raw_consumption_{zip_code}.csv')
+                paths[zip_code] = path
+                rows[['Date/Time', 'Active Energy (kWh)']].to_csv(path, index=False)
+            else:
+                rows[['Date/Time', 'Active Energy (kWh)']].to_csv(path, mode='a', header=False, index=False)
+        print(f"Chunk {i + 1} processed ({len(paths)} zip code(s) found so far).")
+
+    return paths
+
+
+def process_consumption_by_zip_code(zip_codes=None, chunksize=CHUNK_SIZE):
+    """
+    Processes the raw export into one cleaned consumption series per zip code,
+    saved as 'processed_data/consumption_by_zip/processed_consumption_<zip>.csv'.
+
+    Args:
+        zip_codes (list[str], optional): Zip codes to process. Defaults to all of them.
+        chunksize (int): Number of rows of the raw export read at a time.
+
+    Returns:
+        dict: Maps each zip code to the path of its processed file.
+    """
+    raw_path = os.path.join('raw_data', 'consumos_horario_codigo_postal.csv')
+    output_dir = os.path.join('processed_data', 'consumption_by_zip')
+
+    print("--- Processing Consumption Data by Zip Code ---")
+    if not os.path.exists(raw_path):
+        print(f"ERROR: Raw consumption data file not found at '{raw_path}'.", file=sys.stderr)
+        sys.exit(1)
+
+    # 1. Split the national export into one (small) raw file per zip code
+    raw_paths = split_consumption_by_zip_code(raw_path, output_dir, zip_codes, chunksize)
+
+    # 2. Clean each zip code separately
+    processed_paths = {}
+    for zip_code, path in raw_paths.items():
+        df_complete = clean_consumption_data(pd.read_csv(path))
+        processed_paths[zip_code] = os.path.join(output_dir, f'processed_consumption_{zip_code}.csv')
+        df_complete.to_csv(processed_paths[zip_code])
+        os.remove(path)
+
+    print(f"\nSuccessfully processed {len(processed_paths)} zip code(s) to '{output_dir}'.")
+    return processed_paths
+
+
+def process_consumption_data(zip_code=ZIP_CODE, chunksize=CHUNK_SIZE):
+    """
+    Loads raw hourly consumption data, cleans it, fills a known gap in the month
+    of October by replicating September's data, and saves it as a processed CSV file.
+
+    The raw export is streamed in chunks and only the rows of `zip_code` are kept.
+    """
+    # Define file paths
+    raw_path = os.path.join('raw_data', 'consumos_horario_codigo_postal.csv')
+    processed_path = os.path.join('processed_data', 'processed_consumption.csv')
+
+    print("--- Processing Consumption Data ---")
+
+    # Create the processed_data directory if it doesn't exist
+    os.makedirs('processed_data', exist_ok=True)
+
+    try:
+        # Keep only the rows of the community from each chunk
+        chunks = [chunk[chunk['Zip Code'] == zip_code]
+                  for chunk in read_consumption_chunks(raw_path, chunksize)]
+        df_consumption = pd.concat(chunks)
+        print(f"Successfully loaded raw data from '{raw_path}'.")
+
+    except FileNotFoundError:
+        print(f"ERROR: Raw consumption data file not found at '{raw_path}'.", file=sys.stderr)
+        sys.exit(1)
+
+    if df_consumption.empty:
+        print(f"ERROR: No consumption data found for zip code '{zip_code}'.", file=sys.stderr)
+        sys.exit(1)
+
+    # --- Data Cleaning and Formatting ---
+    df_complete = clean_consumption_data(df_consumption)
 
     # --- Save Processed Data ---
     df_complete.to_csv(processed_path)
@@ -64,4 +183,4 @@ def process_consumption_data():
 
 
 if __name__ == '__main__':
-    process_consumption_data()
\ No newline at end of file
+    process_consumption_data()
@@ -6,21 +6,64 @@ import os
 import sys
 
 
-# 3. Define turbine performance curve for power calculation
-def calculate_power_from_flow(flow_lps):
-    """Calculates power (kW) from flow (l/s) using linear interpolation."""
-    # Performance curve points (Flow in m³/s vs. Power in kW)
-    q_points_m3s = [0, 0.79, 0.97, 1.14, 1.27]
-    p_points_kw = [0, 15.0, 23.0, 28.6, 29.8]
-    q_min_m3s, q_max_m3s = 0.79, 1.27  # Turbine operating limits
+# 3. Define turbine performance curves for power calculation
+# Performance curve points (Flow in m³/s vs. Power in kW) and operating limits of each turbine
+TURBINE_CURVES = {
+    'Castanheira 30kW': {
+        'q_points_m3s': [0, 0.79, 0.97, 1.14, 1.27],
+        'p_points_kw': [0, 15.0, 23.0, 28.6, 29.8],
+        'q_min_m3s': 0.79,
+        'q_max_m3s': 1.27,
+    },
+}
+DEFAULT_TURBINE = 'Castanheira 30kW'  # Turbine used for the model input
+
+
+def calculate_power_from_flow(flow_lps, curve=None):
+    """
+    Calculates power (kW) from flow (l/s) using linear interpolation.
+
+    Works on a single value or on a whole array of flows at once.
+
+    Args:
+        flow_lps (float or array-like): Flow in l/s.
+        curve (dict, optional): Turbine curve, see `TURBINE_CURVES`. Defaults to `DEFAULT_TURBINE`.
+
+    Returns:
+        float or np.ndarray: Power in kW, with the same shape as `flow_lps`.
+    """
+    if curve is None:
+        curve = TURBINE_CURVES[DEFAULT_TURBINE]
+
+    flow_m3s = np.asarray(flow_lps, dtype=float) / 1000.0
+    power_kw = np.interp(flow_m3s, curve['q_points_m3s'], curve['p_points_kw'])
+
+    # Power is zero if flow is outside the turbine's operating range (or missing)
+    in_range = (flow_m3s >= curve['q_min_m3s']) & (flow_m3s <= curve['q_max_m3s'])
+    power_kw = np.where(in_range, power_kw, 0.0)
 
-    flow_m3s = flow_lps / 1000.0
+    return power_kw if power_kw.ndim else float(power_kw)
+
+
+def calculate_power_for_turbines(flow_lps, turbines=None):
+    """
+    Calculates the power (kW) of several candidate turbines for the same flow record.
+
+    Args:
+        flow_lps (pd.Series or array-like): Flow in l/s.
+        turbines (dict, optional): Maps a turbine name to its curve. Defaults to `TURBINE_CURVES`.
+
+    Returns:
+        pd.DataFrame: One power column (kW) per turbine, indexed like `flow_lps` if it is a Series.
+    """
+    if turbines is None:
+        turbines = TURBINE_CURVES
 
-    # Power is zero if flow is outside the turbine's operating range
-    if not (q_min_m3s <= flow_m3s <= q_max_m3s):
-        return 0.0
+    index = flow_lps.index if isinstance(flow_lps, pd.Series) else None
+    flow = np.asarray(flow_lps, dtype=float)
+    return pd.DataFrame({name: calculate_power_from_flow(flow, curve) for name, curve in turbines.items()},
+                        index=index)
 
-    return np.interp(flow_m3s, q_points_m3s, p_points_kw)
 
 def process_hydro_data():
     """
@@ -59,8 +102,8 @@ def process_hydro_data():
     df_hydro = df_hydro.loc[mask].copy()
     df_hydro.set_index('Time', inplace=True)
 
-    # 4. Apply the function to create the power column
-    df_hydro['hydro_inflow_kwh'] = df_hydro['Q (l/s)'].apply(calculate_power_from_flow)
+    # 4. Convert the whole flow column to power at once
+    df_hydro['hydro_inflow_kwh'] = calculate_power_from_flow(df_hydro['Q (l/s)'].to_numpy())
 
     # 5. Create final DataFrame with only the required column
     df_final = df_hydro[['hydro_inflow_kwh']]
@@ -0,0 +1,241 @@
+# scripts/run_pipeline.py
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Processing stages: the script (module) and function producing each processed file,
+# and the raw files it reads.
+STAGES = {
+    'consumption': {
+        'module': 'process_consumption',
+        'function': 'process_consumption_data',
+        'inputs': [os.path.join('raw_data', 'consumos_horario_codigo_postal.csv')],
+        'output': os.path.join('processed_data', 'processed_consumption.csv'),
+    },
+    'price': {
+        'module': 'process_grid_price',
+        'function': 'process_price_data',
+        'inputs': [os.path.join('raw_data', 'grid_price_portugal.csv')],
+        'output': os.path.join('processed_data', 'processed_grid_price.csv'),
+    },
+    'hydro': {
+        'module': 'process_hydro',
+        'function': 'process_hydro_data',
+        'inputs': [os.path.join('raw_data', 'HydroCastanheiraIST.csv')],
+        'output': os.path.join('processed_data', 'processed_hydro.csv'),
+    },
+    'renewables': {
+        'module': 'process_renewable_ninja',
+        'function': 'process_renewable_data',
+        'inputs': [os.path.join('raw_data', 'ninja_wind_40.0047_-8.2091_corrected.csv'),
+                   os.path.join('raw_data', 'ninja_pv_40.0047_-8.2091_corrected.csv')],
+        'output': os.path.join('processed_data', 'processed_renewables.csv'),
+    },
+}
+
+# Final step, combining the outputs of all the stages above.
+COMBINE_STAGE = {
+    'module': 'combine_all_data',
+    'function': 'combine_processed_data',
+    'output': 'model_timeseries.csv',
+}
+
+# Records the hashes of the inputs, scripts and outputs of the last successful run.
+MANIFEST_PATH = os.path.join('processed_data', 'pipeline_manifest.json')
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Returns the fingerprint (SHA-256 hash, size and modification time) of a file,
+    or None if it does not exist.
+
+    If the size and modification time match the `previous` fingerprint, its hash
+    is reused instead of reading the whole file again.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+        return previous
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'sha256': digest.hexdigest(), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _same_content(a, b):
+    """Compares two fingerprints on their content hash only."""
+    return a is not None and b is not None and a['sha256'] == b['sha256']
+
+
+def _stage_sources(stage, previous):
+    """Fingerprints the script and the input files of a stage."""
+    previous = previous or {}
+    script = stage['module'] + '.py'
+    return {path: file_fingerprint(path, previous.get('sources', {}).get(path))
+            for path in [script] + stage.get('inputs', [])}
+
+
+def _is_stale(sources, output, previous):
+    """A stage must run again if its output is missing or changed, or if any source changed."""
+    if previous is None or output is None:
+        return True
+    if not _same_content(output, previous.get('output')):
+        return True
+    return any(not _same_content(fp, previous.get('sources', {}).get(path)) for path, fp in sources.items())
+
+
+def load_manifest():
+    """Loads the manifest of the last run (empty if the pipeline never ran)."""
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    """Saves the manifest of the current run."""
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def run_stage(stage, capture_output=False):
+    """
+    Imports the script of a stage and runs its processing function.
+
+    Returns:
+        tuple: The wall-clock time of the stage (s) and its console output
+               (None unless `capture_output` is True).
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(stage['module'])
+    if capture_output:
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            getattr(module, stage['function'])()
+        return time.perf_counter() - start, buffer.getvalue()
+
+    getattr(module, stage['function'])()
+    return time.perf_counter() - start, None
+
+
+def _init_worker(directory):
+    """Makes the processing scripts importable in a worker process."""
+    os.chdir(directory)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+
+def run_pipeline(force=False, max_workers=None):
+    """
+    Runs the preprocessing pipeline, rebuilding only what changed.
+
+    A processing stage runs again only if its script or raw input files changed
+    since the last run (or if its output is missing or was modified). The final
+    `model_timeseries.csv` is rebuilt only if at least one processed file changed.
+
+    The processing stages do not depend on each other, so the ones to rebuild run
+    concurrently in a process pool; the combine step runs once they are all done.
+
+    Args:
+        force (bool): Rebuild every stage regardless of the manifest.
+        max_workers (int, optional): Number of worker processes. Use 1 to run the
+                                     stages one after the other in this process.
+
+    Returns:
+        dict: The wall-clock time (s) of each stage that was run.
+    """
+    print("--- Running the Preprocessing Pipeline ---")
+    pipeline_start = time.perf_counter()
+    manifest = load_manifest()
+    new_manifest = {}
+    timings = {}
+
+    # --- 1. Find the processing stages to rebuild ---
+    to_run = []
+    for name, stage in STAGES.items():
+        previous = manifest.get(name)
+        sources = _stage_sources(stage, previous)
+        missing = [path for path, fp in sources.items() if fp is None]
+        if missing:
+            print(f"ERROR: Missing file(s) for stage '{name}': {missing}", file=sys.stderr)
+            sys.exit(1)
+
+        output = file_fingerprint(stage['output'], (previous or {}).get('output'))
+        if force or _is_stale(sources, output, previous):
+            print(f"[{name}] Inputs changed, will run '{stage['module']}.py'.")
+            to_run.append(name)
+        else:
+            print(f"[{name}] Up to date, skipped.")
+        new_manifest[name] = {'sources': sources, 'output': output}
+
+    # The scripts create this directory themselves, but not concurrently.
+    os.makedirs('processed_data', exist_ok=True)
+
+    # --- 2. Run them (concurrently) ---
+    if max_workers == 1 or len(to_run) <= 1:
+        for name in to_run:
+            print(f"\n[{name}] Running '{STAGES[name]['module']}.py'...")
+            timings[name], _ = run_stage(STAGES[name])
+    elif to_run:
+        print(f"\nRunning {len(to_run)} stages concurrently...")
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(os.getcwd(),)) as executor:
+            futures = {name: executor.submit(run_stage, STAGES[name], True) for name in to_run}
+            for name, future in futures.items():
+                timings[name], output_text = future.result()
+                print(f"\n[{name}] Output of '{STAGES[name]['module']}.py':")
+                print(output_text, end='')
+
+    for name in to_run:
+        new_manifest[name]['output'] = file_fingerprint(STAGES[name]['output'])
+
+    # --- 3. Combine step ---
+    previous = manifest.get('combine')
+    sources = _stage_sources(COMBINE_STAGE, previous)
+    # The combine step depends on the processed files produced above.
+    sources.update({STAGES[name]['output']: new_manifest[name]['output'] for name in STAGES})
+
+    output = file_fingerprint(COMBINE_STAGE['output'], (previous or {}).get('output'))
+    if force or _is_stale(sources, output, previous):
+        print(f"\n[combine] Processed data changed, running '{COMBINE_STAGE['module']}.py'...")
+        timings['combine'], _ = run_stage(COMBINE_STAGE)
+        output = file_fingerprint(COMBINE_STAGE['output'])
+    else:
+        print("\n[combine] Up to date, skipped.")
+    new_manifest['combine'] = {'sources': sources, 'output': output}
+
+    save_manifest(new_manifest)
+
+    # --- 4. Timing summary ---
+    print("\n--- Stage Timings ---")
+    for name, seconds in timings.items():
+        print(f"{name:<15} | {seconds:>8.2f} s")
+    print(f"{'Total (wall)':<15} | {time.perf_counter() - pipeline_start:>8.2f} s")
+    print(f"\nSUCCESS: Pipeline finished. Stages run: {list(timings) or 'none'}.")
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the preprocessing stages whose inputs changed.")
+    parser.add_argument('--force', action='store_true', help="rebuild every stage")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="number of stages run concurrently (default: number of CPUs, 1 = serial)")
+    args = parser.parse_args()
+
+    # The processing scripts use paths relative to the Preprocessing directory.
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+    run_pipeline(force=args.force, max_workers=args.jobs)
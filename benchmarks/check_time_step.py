@@ -0,0 +1,70 @@
+# benchmarks/check_time_step.py
+
+import argparse
+import contextlib
+import io
+import sys
+
+from benchmarks.run_benchmarks import make_benchmark_data
+from utils.data_loader import load_model_data
+from utils.model_param import get_model_parameters
+from utils.multi_node_builder import example_community, solve_multi_node_network
+from utils.network_builder import prepare_model_data, build_network, solve_network
+
+
+def _single_node(data, params):
+    n = build_network(data, params)
+    return n, solve_network(n, params)
+
+
+def _multi_node(data, params):
+    n, capex = example_community(data, params)
+    return n, solve_multi_node_network(n, capex, params['CAPEX_BUDGET'])
+
+
+MODELS = {'single_node': _single_node, 'multi_node': _multi_node}
+
+
+def check_time_step(days=14, step_hours=0.25, rtol=1e-6, data_path='data/model_timeseries.csv'):
+    """
+    Checks that the results do not depend on the time step of the data.
+
+    The first `days` of the hourly data are solved as they are and split into steps of
+    `step_hours` (every hour repeated, see `make_benchmark_data`). Both describe the
+    same system, so every model must reach the same objective.
+
+    Returns:
+        dict: For each model, the objective at each time step and whether they match.
+    """
+    params = get_model_parameters()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = prepare_model_data(load_model_data(data_path), params)
+    years = days / 365
+
+    results = {}
+    for name, solve in MODELS.items():
+        objectives = {}
+        for step in (1, step_hours):
+            step_data = make_benchmark_data(data, years, step)
+            with contextlib.redirect_stdout(io.StringIO()):
+                n, (status, condition) = solve(step_data, params)
+            if status != 'ok':
+                raise RuntimeError(f"'{name}' failed to solve at a {step} h time step: {condition}")
+            objectives[step] = float(n.objective)
+        hourly, fine = objectives[1], objectives[step_hours]
+        results[name] = {'hourly': hourly, 'fine': fine, 'ok': abs(fine - hourly) <= rtol * abs(hourly)}
+    return results
+
+
+if __name__ == '__main__':
+    # Run from the project root directory: python -m benchmarks.check_time_step
+    parser = argparse.ArgumentParser(description="Check that the results do not depend on the time step.")
+    parser.add_argument('--days', type=int, default=14, help="number of days of data solved")
+    parser.add_argument('--step', type=float, default=0.25, help="fine time step, in hours")
+    args = parser.parse_args()
+
+    results = check_time_step(args.days, args.step)
+    for name, result in results.items():
+        print(f"{name:<12} | 1 h: {result['hourly']:.4f} | {args.step} h: {result['fine']:.4f} | "
+              f"{'OK' if result['ok'] else 'MISMATCH'}")
+    sys.exit(0 if all(result['ok'] for result in results.values()) else 1)
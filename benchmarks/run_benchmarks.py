@@ -0,0 +1,224 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')  # Plots are drawn but never shown during a benchmark.
+import pandas as pd
+
+from utils.data_loader import load_model_data
+from utils.model_param import get_model_parameters, print_optimisation_result
+from utils.model_ploting import plot_energy_balance
+from utils.network_builder import prepare_model_data, build_network, add_capex_budget_constraint
+from utils.telemetry import environment_info
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(BENCHMARK_DIR, 'latest_results.json')
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# Problem sizes: number of years and time step (in hours) of the model.
+SIZES = {
+    '1w_1h': {'years': 7 / 365, 'step_hours': 1},
+    '1y_1h': {'years': 1, 'step_hours': 1},
+    '5y_1h': {'years': 5, 'step_hours': 1},
+    '1w_15min': {'years': 7 / 365, 'step_hours': 0.25},
+    '1y_15min': {'years': 1, 'step_hours': 0.25},
+    '5y_15min': {'years': 5, 'step_hours': 0.25},
+}
+# '5y_15min' (175,200 snapshots) is only run when asked for explicitly.
+DEFAULT_SIZES = ['1w_1h', '1y_1h', '5y_1h', '1w_15min', '1y_15min']
+
+PHASES = ['build', 'create_model', 'solve', 'results']
+
+def make_benchmark_data(data, years, step_hours):
+    """
+    Builds the timeseries of a problem size from the one-year hourly data.
+
+    Longer periods repeat the year, and shorter time steps repeat each hourly
+    value (all the columns are powers, prices or capacity factors).
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        years (float): Length of the modelled period, in years.
+        step_hours (float): Time step of the model, in hours.
+
+    Returns:
+        pd.DataFrame: The timeseries of the benchmark.
+    """
+    n_hours = int(round(years * len(data)))
+    n_repeats = -(-n_hours // len(data))
+    frames = []
+    for k in range(n_repeats):
+        frame = data.copy()
+        frame.index = frame.index + pd.Timedelta(hours=k * len(data))
+        frames.append(frame)
+    hourly = pd.concat(frames).iloc[:n_hours]
+
+    if step_hours == 1:
+        return hourly
+    index = pd.date_range(hourly.index[0], hourly.index[-1] + pd.Timedelta(hours=1),
+                          freq=pd.Timedelta(hours=step_hours), inclusive='left', name=hourly.index.name)
+    return hourly.reindex(index, method='ffill')
+
+
+def _time_phase(timings, phase, function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings[phase] = time.perf_counter() - start
+    return result
+
+
+def run_size(data, params, size, solver_name="highs"):
+    """
+    Runs the four phases of a production run on one problem size.
+
+    Returns:
+        dict: The number of snapshots, the time of each phase (s) and the objective.
+    """
+    spec = SIZES[size]
+    size_data = make_benchmark_data(data, spec['years'], spec['step_hours'])
+    timings = {}
+
+    def build():
+        # The snapshot weightings follow the time step of the data.
+        return build_network(size_data, params)
+
+    def create_model():
+        m = n.optimize.create_model()
+        add_capex_budget_constraint(n, m, params)
+
+    def results():
+        with contextlib.redirect_stdout(io.StringIO()):
+            print_optimisation_result(n)
+        start_date = n.snapshots[0]
+        plot_energy_balance(n, start_date, start_date + pd.Timedelta(days=7), plot_market_price=False,
+                            show=False)
+
+    n = _time_phase(timings, 'build', build)
+    _time_phase(timings, 'create_model', create_model)
+    status, condition = _time_phase(timings, 'solve', n.optimize.solve_model, solver_name=solver_name)
+    if status != 'ok':
+        raise RuntimeError(f"Benchmark '{size}' failed to solve: {condition}")
+    _time_phase(timings, 'results', results)
+
+    return {'snapshots': len(n.snapshots), 'phases': timings, 'objective': float(n.objective)}
+
+
+def run_benchmarks(sizes=None, repeat=1, data_path='data/model_timeseries.csv', solver_name="highs"):
+    """
+    Runs the benchmark on several problem sizes.
+
+    Args:
+        sizes (list[str], optional): Names of the sizes in `SIZES` (default: `DEFAULT_SIZES`).
+        repeat (int): Number of runs of each size. The fastest time of each phase is kept.
+        data_path (str): Path to the model timeseries CSV file.
+        solver_name (str): Name of the solver used by linopy.
+
+    Returns:
+        dict: The environment and, for each size, the times of its phases.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark size(s) {unknown}. Choose from {list(SIZES)}.")
+
+    params = get_model_parameters()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = prepare_model_data(load_model_data(data_path), params)
+
+    results = {}
+    for size in sizes:
+        runs = []
+        for i in range(repeat):
+            print(f"--- Benchmark '{size}' (run {i + 1}/{repeat}) ---")
+            runs.append(run_size(data, params, size, solver_name))
+        results[size] = {
+            'snapshots': runs[0]['snapshots'],
+            'objective': runs[0]['objective'],
+            'phases': {phase: min(run['phases'][phase] for run in runs) for phase in PHASES},
+        }
+    environment = {'date': datetime.datetime.now().isoformat(timespec='seconds'), **environment_info()}
+    return {'environment': environment, 'results': results}
+
+
+def compare_with_baseline(results, baseline, tolerance=0.2, min_seconds=0.05):
+    """
+    Compares the phase times of a benchmark with a baseline.
+
+    A phase is a regression if it is more than `tolerance` (relative) and
+    `min_seconds` (absolute) slower than in the baseline.
+
+    Returns:
+        tuple:
+            - pd.DataFrame: Baseline and current time (s) and ratio of each size and phase.
+            - list[str]: The regressions found, e.g. '1y_1h/solve'.
+    """
+    rows = []
+    for size, current in results['results'].items():
+        reference = baseline['results'].get(size)
+        if reference is None:
+            continue
+        for phase in PHASES:
+            before, after = reference['phases'][phase], current['phases'][phase]
+            rows.append({'size': size, 'phase': phase, 'baseline_s': before, 'current_s': after,
+                         'ratio': after / before if before > 0 else float('nan')})
+
+    report = pd.DataFrame(rows, columns=['size', 'phase', 'baseline_s', 'current_s', 'ratio'])
+    slower = ((report['current_s'] > report['baseline_s'] * (1 + tolerance))
+              & (report['current_s'] - report['baseline_s'] > min_seconds))
+    regressions = [f"{row.size}/{row.phase}" for row in report[slower].itertuples()]
+    return report.set_index(['size', 'phase']), regressions
+
+
+def print_results(results):
+    """Prints the phase times of each size as a table."""
+    print(f"\n{'Size':<10} | {'Snapshots':>9} | " + " | ".join(f"{phase:>12}" for phase in PHASES))
+    print("-" * (25 + 15 * len(PHASES)))
+    for size, result in results['results'].items():
+        print(f"{size:<10} | {result['snapshots']:>9} | "
+              + " | ".join(f"{result['phases'][phase]:>10.2f} s" for phase in PHASES))
+
+
+if __name__ == '__main__':
+    # Run from the project root directory: python -m benchmarks.run_benchmarks
+    parser = argparse.ArgumentParser(description="Time the build, model creation, solve and results phases.")
+    parser.add_argument('--sizes', nargs='+', default=None,
+                        help=f"problem sizes to run among {list(SIZES)} (default: {DEFAULT_SIZES})")
+    parser.add_argument('--repeat', type=int, default=1, help="runs of each size, the fastest is kept")
+    parser.add_argument('--output', default=RESULTS_PATH, help="JSON file of the results")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="JSON file of the baseline to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat)
+    print_results(results)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to '{args.output}'.")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to '{args.baseline}'.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report, regressions = compare_with_baseline(results, baseline, args.tolerance)
+        print(f"\n--- Comparison with '{args.baseline}' ---")
+        print(report.round(3))
+        if regressions:
+            print(f"\nREGRESSION: slower than the baseline: {regressions}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regression against the baseline.")
+    else:
+        print(f"No baseline found at '{args.baseline}'. Save one with --save-baseline.")
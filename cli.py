@@ -0,0 +1,254 @@
+# cli.py
+"""
+Command-line entry point of the model.
+
+    python cli.py solve [--scenario FILE] [--profile NAME] [--output NETWORK.nc] [--plot]
+    python cli.py sweep --set CAPEX_BUDGET=1e5,2e5 number_of_chargers=0,2 [--workers N]
+    python cli.py plot NETWORK.nc [--kind energy_balance] [--start DATE --end DATE] [--weekly DIR]
+    python cli.py preprocess [--force] [--jobs N]
+    python cli.py validate [--data FILE] [--scenario FILE]
+    python cli.py serve [--scenario FILE] [--port 8765]
+
+Only the standard library is imported here: each subcommand imports the modules
+it needs (PyPSA, matplotlib, ...) when it runs, so that short runs and worker
+processes do not pay for the imports of the other subcommands.
+"""
+
+import argparse
+import os
+import sys
+
+DEFAULT_DATA_PATH = 'data/model_timeseries.csv'
+DEFAULT_PIPELINE_DIR = os.path.join('Castanheira de Pera Example', 'Preprocessing')
+
+
+def _load_scenario(path):
+    from utils.scenario import Scenario
+    return Scenario.from_file(path) if path else Scenario()
+
+
+def _parse_value(text):
+    """Reads a command-line value as a bool, an int, a float or a string."""
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_assignments(assignments):
+    """Parses 'NAME=VALUE[,VALUE...]' arguments into {name: [values]}."""
+    grid = {}
+    for assignment in assignments:
+        name, sep, values = assignment.partition('=')
+        if not sep:
+            raise SystemExit(f"Invalid parameter '{assignment}': expected NAME=VALUE[,VALUE...]")
+        grid[name] = [_parse_value(value) for value in values.split(',')]
+    return grid
+
+
+# =============================================================================
+# --- Subcommands ---
+# =============================================================================
+def cmd_solve(args):
+    """Solves one scenario, prints its results and optionally saves and plots them."""
+    from utils.data_loader import load_model_data
+    from utils.model_param import USE_RESULT_CACHE, print_optimisation_result
+    from utils.network_builder import prepare_model_data, build_network, solve_network
+    from utils.result_cache import solve_network_cached
+    from utils.solver_profiles import get_solver_options
+
+    params = _load_scenario(args.scenario)
+    data = prepare_model_data(load_model_data(args.data), params)
+    solver_options = get_solver_options(args.profile, args.threads, args.time_limit)
+
+    if USE_RESULT_CACHE if args.cache is None else args.cache:
+        n, (status, condition) = solve_network_cached(data, params, solver_options=solver_options)
+    else:
+        n = build_network(data, params)
+        status, condition = solve_network(n, params, solver_options=solver_options)
+
+    print(f"\nOptimization Status: {status}, Condition: {condition}")
+    if status != 'ok':
+        print("Optimization failed. Please check the model and data.", file=sys.stderr)
+        return 1
+
+    print_optimisation_result(n, params)
+    if args.output:
+        n.export_to_netcdf(args.output)
+        print(f"Solved network saved to '{args.output}'.")
+    if args.plot:
+        import pandas as pd
+        from utils.model_ploting import plot_energy_balance
+        plot_energy_balance(n, pd.Timestamp(args.start), pd.Timestamp(args.end), plot_market_price=False)
+    return 0
+
+
+def cmd_sweep(args):
+    """Solves every combination of a grid of parameter values in parallel."""
+    from utils.parameter_sweep import run_parameter_sweep
+    from utils.solver_profiles import get_solver_options
+
+    param_grid = {}
+    if args.scenario:
+        # The parameters of the scenario file that differ from model_param.py
+        # apply to every scenario of the sweep.
+        base, default = _load_scenario(args.scenario), _load_scenario(None)
+        param_grid.update({name: [base[name]] for name in base.input_names() if base[name] != default[name]})
+    param_grid.update(_parse_assignments(args.set))
+
+    results = run_parameter_sweep(param_grid, args.data, args.workers, args.threads,
+                                  solver_options=get_solver_options(args.profile), use_cache=args.cache)
+    results.to_csv(args.output)
+    print(f"\nSUCCESS: Sweep results saved to '{args.output}'.")
+    print(results)
+    return 0
+
+
+def cmd_plot(args):
+    """Plots a network solved and saved by `solve --output`."""
+    import pypsa
+
+    n = pypsa.Network(args.network)
+    if args.weekly:
+        from utils.model_ploting import render_plot_batch, weekly_windows
+        paths = render_plot_batch(n, weekly_windows(n), args.weekly, kind=args.kind,
+                                  storage_name=args.storage, max_workers=args.workers)
+        print(f"{len(paths)} figures saved to '{args.weekly}'.")
+        return 0
+
+    import pandas as pd
+    from utils.model_ploting import plot_energy_balance, plot_storage_operation
+    show = args.save is None
+    if args.kind == 'energy_balance':
+        # The whole period by default
+        start = pd.Timestamp(args.start) if args.start else n.snapshots[0]
+        end = pd.Timestamp(args.end) if args.end else n.snapshots[-1]
+        plot_energy_balance(n, start, end, plot_market_price=args.market_price, show=show, save_path=args.save)
+    else:
+        plot_storage_operation(n, args.storage, args.start, args.end, show=show, save_path=args.save)
+    return 0
+
+
+def cmd_preprocess(args):
+    """Runs the preprocessing pipeline of a case study."""
+    import importlib
+
+    # The processing scripts use paths relative to their directory.
+    directory = os.path.abspath(args.dir)
+    os.chdir(directory)
+    sys.path.insert(0, directory)
+    run_pipeline = importlib.import_module('run_pipeline')
+    run_pipeline.run_pipeline(force=args.force, max_workers=args.jobs)
+    return 0
+
+
+def cmd_validate(args):
+    """Checks the input data and the scenario parameters without building the model."""
+    from utils.data_loader import load_model_data
+    from utils.model_param import print_parameters_summary
+
+    # Without the cache, the CSV file is always read and validated (the loader
+    # exits with an error message if it is invalid).
+    data = load_model_data(args.data, use_cache=False)
+    print(f"{len(data)} snapshots from {data.index[0]} to {data.index[-1]}.")
+
+    params = _load_scenario(args.scenario)
+    print_parameters_summary(params)
+    print("Validation successful.")
+    return 0
+
+
+def cmd_serve(args):
+    """Keeps the model in memory and answers what-if queries over local HTTP."""
+    from utils.data_loader import load_model_data
+    from utils.solver_daemon import SolverSession, serve
+    from utils.solver_profiles import get_solver_options
+
+    session = SolverSession(load_model_data(args.data), _load_scenario(args.scenario),
+                            solver_options=get_solver_options(args.profile, args.threads))
+    serve(session, args.host, args.port)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="PyPSA energy community model.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # --- solve ---
+    solve = subparsers.add_parser('solve', help="solve one scenario")
+    solve.add_argument('--scenario', help="TOML/YAML scenario file (default: utils/model_param.py)")
+    solve.add_argument('--data', default=DEFAULT_DATA_PATH, help="model timeseries CSV file")
+    solve.add_argument('--profile', default=None, help="solver profile (default: SOLVER_PROFILE)")
+    solve.add_argument('--threads', type=int, default=None, help="maximum number of solver threads")
+    solve.add_argument('--time-limit', type=float, default=None, help="time limit of the solve (s)")
+    solve.add_argument('--cache', action=argparse.BooleanOptionalAction, default=None,
+                       help="load and store the solution in the result cache (default: USE_RESULT_CACHE)")
+    solve.add_argument('--output', help="save the solved network to this NetCDF file")
+    solve.add_argument('--plot', action='store_true', help="plot the energy balance")
+    solve.add_argument('--start', default='2019-03-11', help="first day of the plot")
+    solve.add_argument('--end', default='2019-03-23', help="last day of the plot")
+    solve.set_defaults(func=cmd_solve)
+
+    # --- sweep ---
+    sweep = subparsers.add_parser('sweep', help="solve a grid of scenarios in parallel")
+    sweep.add_argument('--set', nargs='+', required=True, metavar='NAME=VALUE[,VALUE...]',
+                       help="parameter values to explore, e.g. CAPEX_BUDGET=1e5,2e5")
+    sweep.add_argument('--scenario', help="TOML/YAML scenario file the sweep starts from")
+    sweep.add_argument('--data', default=DEFAULT_DATA_PATH, help="model timeseries CSV file")
+    sweep.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    sweep.add_argument('--threads', type=int, default=1, help="solver threads per worker")
+    sweep.add_argument('--profile', default=None, help="solver profile (default: SOLVER_PROFILE)")
+    sweep.add_argument('--cache', action='store_true', help="use the result cache")
+    sweep.add_argument('--output', default='sweep_results.csv', help="CSV file of the results")
+    sweep.set_defaults(func=cmd_sweep)
+
+    # --- plot ---
+    plot = subparsers.add_parser('plot', help="plot a solved network saved with 'solve --output'")
+    plot.add_argument('network', help="NetCDF file of the solved network")
+    plot.add_argument('--kind', choices=['energy_balance', 'storage_operation'], default='energy_balance')
+    plot.add_argument('--storage', default='Hydro Reservoir', help="storage unit of a storage_operation plot")
+    plot.add_argument('--start', default=None, help="first day of the plot")
+    plot.add_argument('--end', default=None, help="last day of the plot")
+    plot.add_argument('--market-price', action='store_true', help="also plot the grid price")
+    plot.add_argument('--save', help="save the figure to this file instead of showing it")
+    plot.add_argument('--weekly', metavar='DIR', help="save one figure per week to this directory")
+    plot.add_argument('--workers', type=int, default=None, help="processes rendering the weekly figures")
+    plot.set_defaults(func=cmd_plot)
+
+    # --- preprocess ---
+    preprocess = subparsers.add_parser('preprocess', help="run the preprocessing pipeline")
+    preprocess.add_argument('--dir', default=DEFAULT_PIPELINE_DIR, help="directory of run_pipeline.py")
+    preprocess.add_argument('--force', action='store_true', help="rebuild every stage")
+    preprocess.add_argument('--jobs', type=int, default=None, help="number of stages run concurrently")
+    preprocess.set_defaults(func=cmd_preprocess)
+
+    # --- validate ---
+    validate = subparsers.add_parser('validate', help="check the input data and the scenario")
+    validate.add_argument('--data', default=DEFAULT_DATA_PATH, help="model timeseries CSV file")
+    validate.add_argument('--scenario', help="TOML/YAML scenario file")
+    validate.set_defaults(func=cmd_validate)
+
+    # --- serve ---
+    serve = subparsers.add_parser('serve', help="answer what-if queries from a model kept in memory")
+    serve.add_argument('--scenario', help="TOML/YAML base scenario file")
+    serve.add_argument('--data', default=DEFAULT_DATA_PATH, help="model timeseries CSV file")
+    serve.add_argument('--profile', default=None, help="solver profile (default: SOLVER_PROFILE)")
+    serve.add_argument('--threads', type=int, default=None, help="maximum number of solver threads")
+    serve.add_argument('--host', default='127.0.0.1', help="address to listen on (local only by default)")
+    serve.add_argument('--port', type=int, default=8765)
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,179 +1,94 @@
-import pypsa
 import sys
 import pandas as pd
-from utils.model_ploting import *
-from utils.data_loader import load_model_data
-from utils.model_param import *
+from utils.data_loader import load_model_data, infer_time_step
+from utils.model_param import (USE_RESULT_CACHE, SOLVER_PROFILE, print_parameters_summary,
+                               print_optimisation_result)
+from utils.network_builder import prepare_model_data, build_network, add_capex_budget_constraint
+from utils.scenario import Scenario
+from utils.result_cache import scenario_key, load_cached_network, store_network
+from utils.solver_profiles import get_solver_options
+from utils.telemetry import (new_run_record, measure_phase, model_statistics, solver_statistics,
+                             write_run_record, TELEMETRY_PATH)
 
 # =============================================================================
 # --- 1. Data Loading and Preparation ---
 # =============================================================================
-# Load consumption, renewable profiles, and electricity prices
-data = load_model_data()
-
-# Define the annual energy demand in mWh
-data['consumption_mwh'] = (data['consumption_kwh'] / 1000)
-# autoscale the consumption to the annual demand
-auto_factor = ANNUAL_ENERGY_DEMAND / data['consumption_mwh'].sum()
-data['consumption_mwh'] = auto_factor * data['consumption_mwh']
+# The scenario: the values of utils/model_param.py, or a TOML/YAML scenario file
+# given as argument, e.g. python "optimiser main.py" scenarios/example.toml
+params = Scenario.from_file(sys.argv[1]) if len(sys.argv) > 1 else Scenario()
+# Wall time, CPU time and peak memory of each phase, model size and solver
+# statistics of this run, saved as one JSON line in TELEMETRY_PATH.
+telemetry = new_run_record('optimiser main', params)
+
+with measure_phase(telemetry, 'load'):
+    # Load consumption, renewable profiles, and electricity prices
+    data = load_model_data()
+    data = prepare_model_data(data, params)
+auto_factor = params['ANNUAL_ENERGY_DEMAND'] / (data['consumption_kwh'].sum() / 1000)
 
 #some debug and Info.
 print("\n\nAnnual Energy Demand in Castanheira de Pera (MWh):", round(data['consumption_kwh'].sum()/1000,2))
-print("Scaled Annual Energy Demand (MWh):", round(data['consumption_mwh'].sum(),2))
+# consumption_mwh is a mean power (MWh per hour): weighted by the time step to get energies.
+print("Scaled Annual Energy Demand (MWh):", round(data['consumption_mwh'].sum() * infer_time_step(data.index), 2))
 print("Scaling factor applied to consumption (%):", round(auto_factor*100, 2))
 print("\n\n")
 
-print_parameters_summary()
-
+print_parameters_summary(params)
 
-# multiply wind power capacity factor (good zone)
-WIND_CAPACITY_FACTOR = 0.97  # moyenne à 30%
-data['wind_capacity_factor'] = WIND_CAPACITY_FACTOR*data['wind_capacity_factor']
+# HiGHS options of the SOLVER_PROFILE chosen in utils/model_param.py
+solver_options = get_solver_options(SOLVER_PROFILE)
+telemetry['solver_profile'] = SOLVER_PROFILE
 
 # =============================================================================
-# --- 2. PyPSA Network Setup ---
+# --- 2. Result Cache ---
 # =============================================================================
-print("Building the PyPSA network...")
-n = pypsa.Network()
-n.set_snapshots(data.index)
-
-# Add the local electrical bus (node)
-n.add("Bus", "Castanheira de Pera")
-
-# Add the load (consumption) to the bus
-n.add("Load", "Consumption",
-      bus="Castanheira de Pera",
-      p_set=data['consumption_mwh'])
-
-# =============================================================================
-# --- 3. Adding System Components (Generators, Storage, Grid) ---
-# =============================================================================
-
-## ------------------ Renewable Generation ------------------
-# Wind (capacity to be optimized)
-n.add("Generator", "Wind",
-      bus="Castanheira de Pera",
-      p_nom_extendable=True,
-      capital_cost=capital_cost_wind,
-      marginal_cost=0,
-      p_max_pu=data['wind_capacity_factor'])
-
-# Solar (capacity to be optimized)
-n.add("Generator", "Solar",
-      bus="Castanheira de Pera",
-      p_nom_extendable=True,
-      capital_cost=capital_cost_solar,
-      marginal_cost=0,
-      p_max_pu=data['solar_capacity_factor'])
-
-# Biomass ORC (capacity to be optimized)
-# produce 4 time more heat than electricity...
-# this model assume we sell the heat as a by-product to take it into account.
-# Assume we sell heat (natural gas price) at 55% the price of the electricity
-# Assume also 80% efficiency for the ORC heat system. (heat distribution efficiency)
-# 0.8 * 4 * 0.6 = 1.92
-n.add("Generator", "Biomass ORC",
-      bus="Castanheira de Pera",
-      p_nom_extendable=True,
-      capital_cost=capital_cost_ORC_Biomass,
-      marginal_cost=- 4 * 0.55 * data["grid_price_eur_per_mwh"]) # Negative cost can represent revenue from by-products like heat
-
-## ------------------ Storage Units ------------------
-# Hydro Reservoir (modeled as a StorageUnit)
-n.add("StorageUnit", "Hydro Reservoir",
-      bus="Castanheira de Pera",
-      p_nom=30 / 1000,                # 30kW if fixed power capacity
-      p_nom_extendable=not IS_HYDRO_FIXED, # Capacity is fixed if IS_HYDRO_FIXED is True
-      capital_cost=capital_cost_hydro,
-      marginal_cost=0,                # Assumed low operational cost
-      p_min_pu=-PUMPING_HYDRO,                     # 0 = Cannot consume power (no pumping)
-      inflow=data['hydro_inflow_kwh'] / 1000, # Natural recharge from river/rain
-      max_hours=RESERVOIR_CAPACITY_HYDRO, # Reservoir size in hours at full power
-      cyclic_state_of_charge=True)    # Ensure reservoir level is same at year end
-
-# Electric Car Battery (Vehicle-to-Grid)
-n.add("StorageUnit", "Electric Car Battery",
-      bus="Castanheira de Pera",
-      p_nom=power_electric_car,       # Total power of the chargers
-      p_nom_extendable=False,         # Not optimized, considered as existing infrastructure
-      capital_cost=0,                 # Assumed to be already installed
-      marginal_cost=0,                # Negligible operating cost
-      max_hours=battery_capacity_electric_car_hours) # Storage capacity in hours at p_nom
-
-
-## ------------------ Grid Connection ------------------
-# Create a bus to represent the external grid (infinite source/sink)
-n.add("Bus", "Grid")
-
-# Link for PURCHASING (Importing) electricity
-# Flow from "Grid" to "Castanheira de Pera"
-n.add("Link", "Grid Import",
-      bus0="Grid",
-      bus1="Castanheira de Pera",
-      p_nom=1e9,  # Infinite import capacity
-      p_min_pu=0,
-      marginal_cost=data['grid_price_eur_per_mwh'])  # Purchase price in €/MWh
-
-# Link for SELLING (Exporting) electricity
-# Flow from "Castanheira de Pera" to "Grid"
-n.add("Link", "Grid Export",
-      bus0="Castanheira de Pera",
-      bus1="Grid",
-      p_nom=GRID_INJECTION_LIMIT * max(data['consumption_mwh']),
-      p_min_pu=0,
-      marginal_cost=-0.9 * data['grid_price_eur_per_mwh']) # Negative cost represents revenue
-
-# Add a "slack" generator to the grid bus to balance the whole system
-n.add("Generator",
-      "Grid Slack Source",
-      bus="Grid",
-      control='Slack',
-      p_nom=1e9,   # Infinite capacity
-      p_min_pu=-1, # Can both generate and consume energy
-      marginal_cost=0)
-
-# =============================================================================
-# --- 4. Model Creation and Adding Cost Constraint ---
-# =============================================================================
-print("Creating the Linopy optimization model...")
-m = n.optimize.create_model()
-
-# --- Add a global CAPEX budget constraint for all new investments ---
-print(f"Adding the global CAPEX budget constraint: {CAPEX_BUDGET:,.0f} €")
-
-# 1. Initialize the left-hand side (LHS) of the constraint expression.
-total_capex_lhs = 0
-
-# 2. Add the investment costs of extendable generators (Solar, Wind, Biomass).
-gen_p_nom_vars = m.variables['Generator-p_nom']
-total_capex_lhs += gen_p_nom_vars.loc['Wind'] * CAPEX_WIND_MW
-total_capex_lhs += gen_p_nom_vars.loc['Solar'] * CAPEX_SOLAR_MW
-total_capex_lhs += gen_p_nom_vars.loc['Biomass ORC'] * CAPEX_BIOMASS_MW
-
-# 3. Add the hydro investment cost.
-if not IS_HYDRO_FIXED and 'StorageUnit-p_nom' in m.variables:
-    # CASE 1: Hydro capacity is optimized (p_nom_extendable=True).
-    su_p_nom_vars = m.variables['StorageUnit-p_nom']
-    variable_hydro_cost = su_p_nom_vars.loc['Hydro Reservoir'] * CAPEX_HYDRO_MW
-    total_capex_lhs += variable_hydro_cost
+# An identical scenario solved before is loaded instead of being solved again
+# (see utils/result_cache.py). Set USE_RESULT_CACHE to False to always re-solve.
+cache_key = scenario_key(data, params, solver_name="highs", solver_options=solver_options) if USE_RESULT_CACHE else None
+cached = load_cached_network(cache_key) if USE_RESULT_CACHE else None
+telemetry['cache_hit'] = cached is not None
+
+if cached is not None:
+    print("Loaded the solved network from the cache, optimization skipped.")
+    n, (status, condition) = cached
 else:
-    # CASE 2: Hydro capacity is FIXED. Its cost is a constant.
-    hydro_capacity_mw = n.storage_units.at['Hydro Reservoir', 'p_nom']
-    fixed_hydro_cost = hydro_capacity_mw * CAPEX_HYDRO_MW
-    total_capex_lhs += fixed_hydro_cost
-
-# 4. Add the final global budget constraint to the model.
-m.add_constraints(total_capex_lhs, "<=", CAPEX_BUDGET, name="Global_CAPEX_budget_limit")
-
-# =============================================================================
-# --- 5. Running the Optimization ---
-# =============================================================================
-print("Running the optimization with the budget constraint...")
-status, condition = n.optimize.solve_model(solver_name="highs")
+    # =============================================================================
+    # --- 3. PyPSA Network Setup ---
+    # =============================================================================
+    # The bus, load, generators, storage units and grid connection are defined in
+    # utils/network_builder.py
+    print("Building the PyPSA network...")
+    with measure_phase(telemetry, 'build'):
+        n = build_network(data, params)
+
+    # =============================================================================
+    # --- 4. Model Creation and Adding Cost Constraint ---
+    # =============================================================================
+    print("Creating the Linopy optimization model...")
+    with measure_phase(telemetry, 'create_model'):
+        m = n.optimize.create_model()
+
+    # --- Add a global CAPEX budget constraint for all new investments ---
+    print(f"Adding the global CAPEX budget constraint: {params['CAPEX_BUDGET']:,.0f} €")
+    with measure_phase(telemetry, 'capex_constraint'):
+        add_capex_budget_constraint(n, m, params)
+    telemetry['model'] = model_statistics(m)
+
+    # =============================================================================
+    # --- 5. Running the Optimization ---
+    # =============================================================================
+    print(f"Running the optimization with the budget constraint ('{SOLVER_PROFILE}' solver profile)...")
+    with measure_phase(telemetry, 'solve'):
+        status, condition = n.optimize.solve_model(solver_name="highs", solver_options=solver_options)
+    telemetry['solver'] = solver_statistics(m)
+
+    if USE_RESULT_CACHE and status == 'ok':
+        store_network(n, cache_key, status, condition)
 
 print(f"\nOptimization Status: {status}, Condition: {condition}")
 if status != 'ok':
     print("Optimization failed. Please check the model and data.", file=sys.stderr)
+    write_run_record(telemetry)
 else:
     print("Optimization successful.")
 
@@ -181,10 +96,19 @@ else:
 # --- 6. Results and Visualization ---
 # =============================================================================
     # Display a summary of the optimal system configuration
-    print("\n\n")
-    print_optimisation_result(n)
-    print("\n\n")
+    with measure_phase(telemetry, 'results'):
+        print("\n\n")
+        print_optimisation_result(n, params)
+        print("\n\n")
+    telemetry['objective'] = n.objective
+
+    # Saved before plotting: the plot windows stay open until they are closed.
+    write_run_record(telemetry)
+    print(f"Run telemetry saved to '{TELEMETRY_PATH}'.")
+
 
+    # Imported only when plotting: matplotlib is slow to import.
+    from utils.model_ploting import plot_energy_balance, plot_storage_operation
 
     # Plot for a week in Winter
     start_date_winter = pd.Timestamp('2019-03-11')
@@ -1,20 +1,118 @@
 # utils/data_loader.py
 
 import pandas as pd
+import numpy as np
+import hashlib
 import os
 import sys
 
 
-def load_model_data(file_path='data/model_timeseries.csv'):
+# Name of the directory (next to the CSV file) holding the binary cache files.
+CACHE_DIR_NAME = '.cache'
+
+# Columns stored in single precision: capacity factors and prices do not need more
+# than its ~7 significant digits, and it halves their memory (15-minute and
+# multi-year inputs, copies held by the worker processes).
+FLOAT32_COLUMNS = ['wind_capacity_factor', 'solar_capacity_factor', 'grid_price_eur_per_mwh']
+
+
+def infer_time_step(index):
+    """
+    Returns the time step of a timeseries index in hours (e.g. 0.25 for 15-minute
+    data), i.e. its most common interval between consecutive timestamps.
+    """
+    if len(index) < 2:
+        raise ValueError("At least two timestamps are needed to infer the time step.")
+    return pd.Series(index[1:] - index[:-1]).mode().iloc[0] / pd.Timedelta(hours=1)
+
+
+def _file_sha256(file_path):
+    """Returns the SHA-256 hash of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(file_path):
+    """Returns the path of the binary cache file of a CSV file."""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, CACHE_DIR_NAME, os.path.splitext(name)[0] + '.npz')
+
+
+def _read_cache(file_path):
+    """
+    Returns the cached dataframe of a CSV file, or None if there is no cache or if
+    the CSV file changed since the cache was written.
+
+    The cache is fresh when the modification time and size of the CSV file are
+    unchanged. Otherwise, the file content hash decides (e.g. after a checkout
+    that only touched the modification time).
+    """
+    cache_path = _cache_path(file_path)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with np.load(cache_path, allow_pickle=False) as cache:
+            stat = os.stat(file_path)
+            same_stat = (int(cache['source_mtime_ns']) == stat.st_mtime_ns
+                         and int(cache['source_size']) == stat.st_size)
+            if not same_stat and str(cache['source_sha256']) != _file_sha256(file_path):
+                return None
+
+            columns = [str(c) for c in cache['columns']]
+            data = pd.DataFrame({col: cache[f'column_{i}'] for i, col in enumerate(columns)},
+                                index=pd.DatetimeIndex(cache['index'], name=str(cache['index_name']) or None))
+    except (OSError, ValueError, KeyError):
+        # Unreadable or outdated cache format: fall back to the CSV file.
+        return None
+
+    if not same_stat:
+        # Same content, new modification time: refresh the key for the next run.
+        _write_cache(file_path, data)
+    return data
+
+
+def _write_cache(file_path, data):
+    """Saves a validated dataframe as the binary cache of a CSV file."""
+    cache_path = _cache_path(file_path)
+    stat = os.stat(file_path)
+    arrays = {f'column_{i}': data[col].to_numpy() for i, col in enumerate(data.columns)}
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write to a temporary file first, so that parallel workers never read a partial cache.
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f,
+                     index=data.index.to_numpy(),
+                     index_name=np.array(data.index.name or ''),
+                     columns=np.array(data.columns, dtype=str),
+                     source_mtime_ns=np.array(stat.st_mtime_ns),
+                     source_size=np.array(stat.st_size),
+                     source_sha256=np.array(_file_sha256(file_path)),
+                     **arrays)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"WARNING: Could not write the data cache '{cache_path}': {e}", file=sys.stderr)
+
+
+def load_model_data(file_path='data/model_timeseries.csv', use_cache=True):
     """
     Loads the final, pre-processed timeseries data for the optimization model.
 
     This function expects a single, clean CSV file that has been generated
     by the data processing pipeline (e.g., combine_inputs.py).
 
+    The validated data is cached in a binary sidecar file (`.cache/` next to the
+    CSV file). As long as the CSV file is unchanged, later calls read the cache
+    and skip both the CSV parsing and the validation.
+
     Args:
         file_path (str): The path to the final model data CSV file,
                          relative to the project root directory.
+        use_cache (bool): Whether to read and write the binary cache.
 
     Returns:
         pd.DataFrame: A single dataframe containing all necessary timeseries
@@ -29,6 +127,13 @@ def load_model_data(file_path='data/model_timeseries.csv'):
               file=sys.stderr)
         sys.exit(1)
 
+    if use_cache:
+        data = _read_cache(file_path)
+        if data is not None:
+            print(f"Successfully loaded cached data for '{file_path}' (file unchanged, validation skipped).")
+            # Caches written before FLOAT32_COLUMNS hold float64 columns.
+            return data.astype(dict.fromkeys(FLOAT32_COLUMNS, 'float32'))
+
     # Load the data, assuming the first column is the timestamp index
     data = pd.read_csv(file_path, index_col=0, parse_dates=True)
     print(f"Successfully loaded data from '{file_path}'.")
@@ -62,7 +167,22 @@ def load_model_data(file_path='data/model_timeseries.csv'):
         print("\nWARNING: Duplicate timestamps detected in the data file. Removing them...", file=sys.stderr)
         data = data[~data.index.duplicated(keep='first')]
 
-    print("Data validation successful: All required columns are present and no missing values found.")
+    # d) Check the time step: every snapshot of the model lasts the same time
+    step = infer_time_step(data.index)
+    irregular = (data.index[1:] - data.index[:-1]) != pd.Timedelta(hours=step)
+    if irregular.any():
+        print(f"\nERROR: The data file must have a regular time step. {irregular.sum()} intervals differ from "
+              f"the time step of {step * 60:g} minutes, the first one after {data.index[:-1][irregular][0]}.",
+              file=sys.stderr)
+        sys.exit(1)
+
+    data = data.astype(dict.fromkeys(FLOAT32_COLUMNS, 'float32'))
+
+    print(f"Data validation successful: All required columns are present, no missing values found "
+          f"and a regular time step of {step * 60:g} minutes ({len(data)} snapshots).")
+
+    if use_cache:
+        _write_cache(file_path, data)
 
     return data
 
@@ -26,6 +26,10 @@ LIFE_WIND = 25                # Economic lifetime in years
 OPEX_WIND_MW_YEAR = 34 * 1e3          # Annual operational cost in euros/MW/year | Source: 34 €/kW/an
 capital_cost_wind = CAPEX_WIND_MW / LIFE_WIND + OPEX_WIND_MW_YEAR # Annualized capital cost (€/MWp/year)
 
+# --- Wind Resource Configuration ---
+# Scaling applied to the wind capacity factor profile (good zone).
+WIND_CAPACITY_FACTOR = 0.97  # moyenne à 30%
+
 # --- Biomass ORC (Organic Rankine Cycle) Configuration ---
 CAPEX_BIOMASS_MW = 18000 * 1e3 # investment cost per MW (€/MW) | Source: 18000 €/kW
 OPEX_BIOMASS_MW_YEAR = 600 * 1e3        # Annual operational cost in euros/MW/year | Source: 600 €/kW/an
@@ -61,41 +65,91 @@ battery_capacity_electric_car_hours = (number_of_chargers * mean_electric_car_ca
 # --- Grid Interaction Configuration ---
 # Sets the maximum power that can be sold back to the grid.
 GRID_INJECTION_LIMIT = 1       # As a percentage (%) of the system's maximum demand
+# If True, the grid purchases and sales are two generators on the community bus,
+# with an import capacity bounded from the data, instead of two links to a separate
+# 'Grid' bus with a slack generator. Smaller model, same results.
+COMPACT_GRID_INTERFACE = False
+
+# --- Result Cache ---
+# If True, a scenario solved before (same data, parameters, solver options, model
+# code and package versions) is loaded from '.cache/solved_networks' instead of
+# being solved again.
+USE_RESULT_CACHE = False
+
+# --- Solver Profile ---
+# Named set of HiGHS options used for the solve (see SOLVER_PROFILES in
+# utils/solver_profiles.py), e.g. 'default', 'simplex', 'ipm' or 'ipm_no_crossover'.
+# 'tuned' uses the fastest profile found by: python -m utils.solver_profiles
+SOLVER_PROFILE = 'default'
+
+# =============================================================================
+# --- Scenario Parameters ---
+# Gathers the constants above in a dictionary so that scenarios can override
+# them without editing this file.
+# =============================================================================
+def get_model_parameters(**overrides):
+    """
+    Returns the model parameters as a dictionary, with optional overrides.
+
+    Derived values (annualized capital costs, V2G power and storage hours) are
+    recomputed from the overridden inputs, so that changing e.g. `number_of_chargers`
+    also updates `power_electric_car`.
+
+    Args:
+        **overrides: New values for any of the input parameters, see `Scenario.input_names()`.
+
+    Returns:
+        dict: All input and derived parameters, keyed by their name in this module.
+              See `utils/scenario.py` for the same parameters as an immutable object.
+    """
+    # Imported here: the defaults of `Scenario` are the constants of this module.
+    from utils.scenario import Scenario
+
+    # The derived values are computed by the Scenario (same formulas as above).
+    return Scenario().replace(**overrides).to_dict()
 
 # =============================================================================
 # --- Function to Summarize Optimization Results ---
 # no need to modify
 # =============================================================================
-def print_parameters_summary():
+def print_parameters_summary(params=None):
+    """
+    Prints the parameters of a scenario (default: the values of this module).
+
+    Args:
+        params (dict or Scenario, optional): Model parameters, as returned by
+                                             `get_model_parameters`.
+    """
+    p = params or get_model_parameters()
     # --- Structuring data for display ---
     technologies = [
         {
             "Name": "Solar PV",
-            "CAPEX (€/kW)": CAPEX_SOLAR_MW / 1000,
-            "OPEX (€/kW/year)": OPEX_SOLAR_MW_YEAR / 1000,
-            "Lifetime (years)": LIFE_SOLAR,
+            "CAPEX (€/kW)": p['CAPEX_SOLAR_MW'] / 1000,
+            "OPEX (€/kW/year)": p['OPEX_SOLAR_MW_YEAR'] / 1000,
+            "Lifetime (years)": p['LIFE_SOLAR'],
             "Notes": ""
         },
         {
             "Name": "Small Wind",
-            "CAPEX (€/kW)": CAPEX_WIND_MW / 1000,
-            "OPEX (€/kW/year)": OPEX_WIND_MW_YEAR / 1000,
-            "Lifetime (years)": LIFE_WIND,
+            "CAPEX (€/kW)": p['CAPEX_WIND_MW'] / 1000,
+            "OPEX (€/kW/year)": p['OPEX_WIND_MW_YEAR'] / 1000,
+            "Lifetime (years)": p['LIFE_WIND'],
             "Notes": ""
         },
         {
             "Name": "Biomass ORC",
-            "CAPEX (€/kW)": CAPEX_BIOMASS_MW / 1000,
-            "OPEX (€/kW/year)": OPEX_BIOMASS_MW_YEAR / 1000,
-            "Lifetime (years)": LIFE_ORC_Biomass,
+            "CAPEX (€/kW)": p['CAPEX_BIOMASS_MW'] / 1000,
+            "OPEX (€/kW/year)": p['OPEX_BIOMASS_MW_YEAR'] / 1000,
+            "Lifetime (years)": p['LIFE_ORC_Biomass'],
             "Notes": ""
         },
         {
             "Name": "Micro-Hydro",
-            "CAPEX (€/kW)": CAPEX_HYDRO_MW / 1000,
-            "OPEX (€/kW/year)": OPEX_HYDRO_MW_YEAR / 1000,
-            "Lifetime (years)": LIFE_HYDRO,
-            "Notes": f"Reservoir: {RESERVOIR_CAPACITY_HYDRO}h | Fixed: {IS_HYDRO_FIXED}"
+            "CAPEX (€/kW)": p['CAPEX_HYDRO_MW'] / 1000,
+            "OPEX (€/kW/year)": p['OPEX_HYDRO_MW_YEAR'] / 1000,
+            "Lifetime (years)": p['LIFE_HYDRO'],
+            "Notes": f"Reservoir: {p['RESERVOIR_CAPACITY_HYDRO']}h | Fixed: {p['IS_HYDRO_FIXED']}"
         }
     ]
 
@@ -105,15 +159,16 @@ def print_parameters_summary():
     print("=" * 75)
 
     print("\n--- General System & Grid Configuration ---")
-    print(f"{'Total CAPEX Budget:':<35} {CAPEX_BUDGET:,.0f} €")
-    print(f"{'Target Annual Energy Demand:':<35} {ANNUAL_ENERGY_DEMAND} MWh/year")
-    print(f"{'Grid Injection Limit:':<35} {GRID_INJECTION_LIMIT:.0%}")
+    print(f"{'Total CAPEX Budget:':<35} {p['CAPEX_BUDGET']:,.0f} €")
+    print(f"{'Target Annual Energy Demand:':<35} {p['ANNUAL_ENERGY_DEMAND']} MWh/year")
+    print(f"{'Grid Injection Limit:':<35} {p['GRID_INJECTION_LIMIT']:.0%}")
+    print(f"{'Compact Grid Interface:':<35} {p['COMPACT_GRID_INTERFACE']}")
 
     print("\n--- V2G (Vehicle-to-Grid) Configuration ---")
-    print(f"{'Number of Chargers:':<35} {number_of_chargers}")
-    print(f"{'Max Power per Charger:':<35} {max_power_per_charger * 1000:.1f} kW")
-    print(f"{'Total V2G Power:':<35} {power_electric_car * 1000:.2f} kW")
-    print(f"{'Total V2G Capacity:':<35} {mean_electric_car_capacity * number_of_chargers * 1000:.2f} kWh")
+    print(f"{'Number of Chargers:':<35} {p['number_of_chargers']}")
+    print(f"{'Max Power per Charger:':<35} {p['max_power_per_charger'] * 1000:.1f} kW")
+    print(f"{'Total V2G Power:':<35} {p['power_electric_car'] * 1000:.2f} kW")
+    print(f"{'Total V2G Capacity:':<35} {p['mean_electric_car_capacity'] * p['number_of_chargers'] * 1000:.2f} kWh")
 
     print("\n--- Technology Specific Parameters ---")
     header = f"{'Technology':<15} | {'CAPEX (€/kW)':<15} | {'OPEX (€/kW/year)':<18} | {'Lifetime (years)':<18} | {'Notes'}"
@@ -134,63 +189,104 @@ def print_parameters_summary():
     print(separator)
     print("\n")
 
-def print_optimisation_result(n):
+# Assets reported by `compute_optimisation_kpis`: name in the network -> prefix of the KPI keys.
+PRODUCTION_ASSETS = {'Solar': 'solar', 'Wind': 'wind', 'Biomass ORC': 'biomass'}
+STORAGE_ASSETS = {'Electric Car Battery': 'electric_car', 'Hydro Reservoir': 'hydro'}
+
+
+def compute_optimisation_kpis(n, params=None):
+    """
+    Computes the key results of a solved network as one flat record.
+
+    Each time-series table (`generators_t`, `storage_units_t`, grid exchange) is
+    reduced once to weighted totals: energies use the `generators` snapshot
+    weightings and costs the `objective` ones, so that networks on representative
+    periods or with a time step other than one hour are reported correctly.
+
+    Args:
+        n (pypsa.Network): The solved network.
+        params (dict or Scenario, optional): Model parameters the network was built
+                                             with (default: the values of this module).
+
+    Returns:
+        dict: Capacities (MW, MWh), investments (k€), annual energies (MWh),
+              LCOE/LCOS (€/kWh), grid purchases and sales (MWh, k€/year), the
+              grid-only benchmark cost and the total annualized cost (k€/year).
+    """
+    # Imported here: reading the parameters of this module must not import PyPSA.
+    from utils.network_builder import grid_exchange
+
+    params = params or get_model_parameters()
+    w_energy = n.snapshot_weightings.generators
+    w_cost = n.snapshot_weightings.objective
+
+    # --- Weighted totals, one pass per table ---
+    generation = n.generators_t.p.mul(w_energy, axis=0).sum()
+    dispatch = n.storage_units_t.p_dispatch.mul(w_energy, axis=0).sum()
+    inflow = n.storage_units_t.inflow.mul(w_energy, axis=0).sum()
+    grid = grid_exchange(n)
+    grid_energy = grid[['purchase', 'sale']].mul(w_energy, axis=0).sum()
+    grid_cost = pd.Series({'purchase': (grid['purchase'] * grid['purchase_price']).mul(w_cost).sum(),
+                           'sale': (grid['sale'] * grid['sale_price']).mul(w_cost).sum()})
+
+    record = {}
+
+    # --- Production technologies ---
+    names = list(PRODUCTION_ASSETS)
+    p_nom = n.generators.p_nom_opt.reindex(names, fill_value=0)
+    energy = generation.reindex(names, fill_value=0)
+    capital_cost = n.generators.capital_cost.reindex(names, fill_value=0)
+    capex = p_nom * pd.Series([params['CAPEX_SOLAR_MW'], params['CAPEX_WIND_MW'], params['CAPEX_BIOMASS_MW']],
+                              index=names) / 1e3
+    lcoe = (p_nom * capital_cost / energy.where(energy > 1) / 1e3).fillna(0)
+    for name, key in PRODUCTION_ASSETS.items():
+        record[f'p_nom_{key}_mw'] = p_nom[name]
+        record[f'capex_{key}_k_eur'] = capex[name]
+        record[f'energy_{key}_mwh'] = energy[name]
+        record[f'lcoe_{key}_eur_per_kwh'] = lcoe[name]
+
+    # --- Storage technologies ---
+    names = list(STORAGE_ASSETS)
+    p_nom = n.storage_units.p_nom_opt.reindex(names, fill_value=0)
+    e_nom = n.storage_units.max_hours.reindex(names, fill_value=0) * p_nom
+    energy = dispatch.reindex(names, fill_value=0)
+    capital_cost = n.storage_units.capital_cost.reindex(names, fill_value=0)
+    lcos = (p_nom * capital_cost / energy.where(energy > 1) / 1e3).fillna(0)
+    # The EV batteries belong to their owners: only the hydro plant is an investment.
+    capex = pd.Series([p_nom['Electric Car Battery'] * capital_cost['Electric Car Battery'],
+                       p_nom['Hydro Reservoir'] * params['CAPEX_HYDRO_MW']], index=names) / 1e3
+    for name, key in STORAGE_ASSETS.items():
+        record[f'p_nom_{key}_mw'] = p_nom[name]
+        record[f'e_nom_{key}_mwh'] = e_nom[name]
+        record[f'capex_{key}_k_eur'] = capex[name]
+        record[f'dispatch_{key}_mwh'] = energy[name]
+        record[f'lcos_{key}_eur_per_kwh'] = lcos[name]
+    record['inflow_hydro_mwh'] = inflow.get('Hydro Reservoir', 0)
+
+    # --- Grid exchange ---
+    consumption = n.loads_t.p_set['Consumption']
+    record['demand_mwh'] = consumption.mul(w_energy).sum()
+    record['grid_purchase_mwh'] = grid_energy['purchase']
+    record['grid_sale_mwh'] = grid_energy['sale']
+    record['grid_purchase_cost_k_eur'] = grid_cost['purchase'] / 1e3
+    record['grid_sale_revenue_k_eur'] = grid_cost['sale'] / 1e3
+    record['net_grid_cost_k_eur'] = record['grid_purchase_cost_k_eur'] - record['grid_sale_revenue_k_eur']
+
+    # --- Financial summary ---
+    record['total_investment_k_eur'] = (record['capex_solar_k_eur'] + record['capex_wind_k_eur']
+                                        + record['capex_hydro_k_eur'] + record['capex_biomass_k_eur'])
+    record['benchmark_cost_k_eur'] = (grid['purchase_price'] * consumption).mul(w_cost).sum() / 1e3
+    record['total_cost_k_eur'] = n.objective / 1e3
+
+    return {key: float(value) for key, value in record.items()}
+
+
+def print_optimisation_result(n, params=None):
     """
     Prints a detailed yet compact summary of the optimized energy system in tables.
-    Version 3: Details grid purchase and sale costs.
+    Version 4: View over the record of `compute_optimisation_kpis`.
     """
-    # ... (toute la section d'extraction et de calcul des données reste identique)
-    # Solar
-    p_nom_solar = n.generators.p_nom_opt.get('Solar', 0)
-    e_prod_solar = n.generators_t.p.get('Solar', pd.Series([0])).sum()
-    capex_solar = p_nom_solar * CAPEX_SOLAR_MW / 1e3
-    lcoe_solar = (
-                p_nom_solar * n.generators.capital_cost.get('Solar', 0) / e_prod_solar / 1e3) if e_prod_solar > 1 else 0
-
-    # Wind
-    p_nom_wind = n.generators.p_nom_opt.get('Wind', 0)
-    e_prod_wind = n.generators_t.p.get('Wind', pd.Series([0])).sum()
-    capex_wind = p_nom_wind * CAPEX_WIND_MW / 1e3
-    lcoe_wind = (p_nom_wind * n.generators.capital_cost.get('Wind', 0) / e_prod_wind / 1e3) if e_prod_wind > 1 else 0
-
-    # Biomass
-    p_nom_biomass = n.generators.p_nom_opt.get('Biomass ORC', 0)
-    e_prod_biomass = n.generators_t.p.get('Biomass ORC', pd.Series([0])).sum()
-    capex_biomass = p_nom_biomass * CAPEX_BIOMASS_MW / 1e3
-    lcoe_biomass = (p_nom_biomass * n.generators.capital_cost.get('Biomass ORC',
-                                                                  0) / e_prod_biomass / 1e3) if e_prod_biomass > 1 else 0
-
-    # Electric Car Battery
-    car_battery_name = 'Electric Car Battery'
-    p_nom_battery = n.storage_units.p_nom_opt.get(car_battery_name, 0)
-    e_nom_battery = n.storage_units.max_hours.get(car_battery_name, 0) * p_nom_battery
-    e_dispatch_battery = n.storage_units_t.p_dispatch.get(car_battery_name, pd.Series([0])).sum()
-    capex_battery = p_nom_battery * n.storage_units.capital_cost.get(car_battery_name, 0) / 1e3
-    lcos_battery = (p_nom_battery * n.storage_units.capital_cost.get(car_battery_name,
-                                                                     0) / e_dispatch_battery / 1e3) if e_dispatch_battery > 1 else 0
-
-    # Hydro
-    hydro_name = 'Hydro Reservoir'
-    p_nom_hydro = n.storage_units.p_nom_opt.get(hydro_name, 0)
-    e_nom_hydro = n.storage_units.max_hours.get(hydro_name, 0) * p_nom_hydro
-    e_dispatch_hydro = n.storage_units_t.p_dispatch.get(hydro_name, pd.Series([0])).sum()
-    inflow_hydro = n.storage_units_t.inflow[hydro_name].sum()
-    capex_hydro = p_nom_hydro * CAPEX_HYDRO_MW / 1e3
-    lcos_hydro = (p_nom_hydro * n.storage_units.capital_cost.get(hydro_name,
-                                                                 0) / e_dispatch_hydro / 1e3) if e_dispatch_hydro > 1 else 0
-
-    # Grid Exchange
-    demand_mwh = n.loads_t.p_set['Consumption'].sum()
-    achat_mwh = -n.links_t.p1["Grid Import"].sum()
-    vente_mwh = n.links_t.p0["Grid Export"].sum()
-    cout_achat_k_eur = (-n.links_t.p1['Grid Import'] * n.links_t.marginal_cost['Grid Import']).sum() / 1e3
-    revenu_vente_k_eur = (n.links_t.p0['Grid Export'] * n.links_t.marginal_cost['Grid Export']).sum() / 1e3
-
-    # Financial Summary
-    total_cost_k_eur = n.objective / 1e3
-    benchmark_cost_k_eur = (n.links_t.marginal_cost['Grid Import'] * n.loads_t.p_set['Consumption']).sum() / 1e3
-    total_investment_k_eur = capex_solar + capex_wind + capex_hydro + capex_biomass
-    net_grid_cost_k_eur = abs(cout_achat_k_eur) - abs(revenu_vente_k_eur)
+    k = compute_optimisation_kpis(n, params)
 
     # --- Printing Section (Version 4) ---
     print("\n" + "=" * 80)
@@ -202,38 +298,36 @@ def print_optimisation_result(n):
     print(
         f"{'Technology':<18} | {'Installed Power':>16} | {'Total Investment':>18} | {'Annual Energy':>15} | {'Cost (LCOE)':>14}")
     print("-" * 80)
-    print(
-        f"{'Solar':<18} | {p_nom_solar:>12.2f} MW | {capex_solar:>14.2f} k€ | {e_prod_solar:>11.2f} MWh | {lcoe_solar:>9.4f} €/kWh")
-    print(
-        f"{'Wind':<18} | {p_nom_wind:>12.2f} MW | {capex_wind:>14.2f} k€ | {e_prod_wind:>11.2f} MWh | {lcoe_wind:>9.4f} €/kWh")
-    print(
-        f"{'Biomass ORC':<18} | {p_nom_biomass:>12.2f} MW | {capex_biomass:>14.2f} k€ | {e_prod_biomass:>11.2f} MWh | {lcoe_biomass:>9.4f} €/kWh")
+    for label, key in [('Solar', 'solar'), ('Wind', 'wind'), ('Biomass ORC', 'biomass')]:
+        print(
+            f"{label:<18} | {k[f'p_nom_{key}_mw']:>12.2f} MW | {k[f'capex_{key}_k_eur']:>14.2f} k€ | "
+            f"{k[f'energy_{key}_mwh']:>11.2f} MWh | {k[f'lcoe_{key}_eur_per_kwh']:>9.4f} €/kWh")
 
     # Storage Technologies Table
     print("\n--- Storage Technologies ---")
     print(
         f"{'Technology':<18} | {'Installed Power':>16} | {'Storage Capacity':>18} | {'Annual Dispatch':>15} | {'Cost (LCOS)':>14}")
     print("-" * 80)
-    print(
-        f"{'Electric Car':<18} | {p_nom_battery:>12.2f} MW | {e_nom_battery:>14.2f} MWh | {e_dispatch_battery:>11.2f} MWh | {lcos_battery:>9.4f} €/kWh")
-    print(
-        f"{'Hydro':<18} | {p_nom_hydro:>12.2f} MW | {e_nom_hydro:>14.2f} MWh | {e_dispatch_hydro:>11.2f} MWh | {lcos_hydro:>9.4f} €/kWh")
+    for label, key in [('Electric Car', 'electric_car'), ('Hydro', 'hydro')]:
+        print(
+            f"{label:<18} | {k[f'p_nom_{key}_mw']:>12.2f} MW | {k[f'e_nom_{key}_mwh']:>14.2f} MWh | "
+            f"{k[f'dispatch_{key}_mwh']:>11.2f} MWh | {k[f'lcos_{key}_eur_per_kwh']:>9.4f} €/kWh")
 
     # System and Grid Summary Table
     print("\n--- System and Grid Operations ---")
     print(f"{'Metric':<35} | {'Value'}")
     print("-" * 55)
-    print(f"{'Total Annual Consumption':<35} | {demand_mwh:>10.2f} MWh/year")
-    print(f"{'Grid Energy Purchased':<35} | {achat_mwh:>10.2f} MWh/year")
-    print(f"{'Total Purchase Cost':<35} | {cout_achat_k_eur:>10.2f} k€/year")
-    print(f"{'Grid Energy Sold':<35} | {vente_mwh:>10.2f} MWh/year")
-    print(f"{'Total Sales Revenue':<35} | {-abs(revenu_vente_k_eur):>10.2f} k€/year")
-    print(f"{'Net Grid Cost (Purchase-Sale)':<35} | {net_grid_cost_k_eur:>10.2f} k€/year")
+    print(f"{'Total Annual Consumption':<35} | {k['demand_mwh']:>10.2f} MWh/year")
+    print(f"{'Grid Energy Purchased':<35} | {k['grid_purchase_mwh']:>10.2f} MWh/year")
+    print(f"{'Total Purchase Cost':<35} | {k['grid_purchase_cost_k_eur']:>10.2f} k€/year")
+    print(f"{'Grid Energy Sold':<35} | {k['grid_sale_mwh']:>10.2f} MWh/year")
+    print(f"{'Total Sales Revenue':<35} | {-abs(k['grid_sale_revenue_k_eur']):>10.2f} k€/year")
+    print(f"{'Net Grid Cost (Purchase-Sale)':<35} | {k['net_grid_cost_k_eur']:>10.2f} k€/year")
 
     # MODIFIED SECTION: Final Financial Summary
     print("\n--- Global Financial Summary ---")
     print(f"{'Metric':<35} | {'Value'}")
     print("-" * 55)
-    print(f"{'Total Investment (S+W+H+B)':<35} | {total_investment_k_eur:>10.2f} k€")
-    print(f"{'Benchmark Cost (Grid Only)':<35} | {benchmark_cost_k_eur:>10.2f} k€/year")
-    print(f"{'Total Annualized Cost (Hybrid)':<35} | {total_cost_k_eur:>10.2f} k€/year\n")
+    print(f"{'Total Investment (S+W+H+B)':<35} | {k['total_investment_k_eur']:>10.2f} k€")
+    print(f"{'Benchmark Cost (Grid Only)':<35} | {k['benchmark_cost_k_eur']:>10.2f} k€/year")
+    print(f"{'Total Annualized Cost (Hybrid)':<35} | {k['total_cost_k_eur']:>10.2f} k€/year\n")
\ No newline at end of file
@@ -1,49 +1,67 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from utils.network_builder import grid_exchange
 
-# --- only function with hydro, biomass and electric car battery implemented ---
-def plot_energy_balance(n, start_date, end_date, plot_market_price=True):
+
+def _window(df, start_date=None, end_date=None):
+    """Selects the rows of a time-series DataFrame between two dates (both included)."""
+    if start_date is None and end_date is None:
+        return df
+    return df.loc[start_date:end_date]
+
+
+def energy_balance_data(n, start_date, end_date):
     """
-    Plots an energy balance chart for a defined period.
+    Extracts the energy flows plotted by `plot_energy_balance` for a period.
 
-    This function generates a single figure showing the time evolution
-    of energy flows (production, consumption, grid exchanges, hydro)
-    and the grid price between a start and end date.
+    Every time series is sliced to the period before the table is assembled,
+    so the cost does not depend on the length of the modelled year.
 
-    Args:
-        n (pypsa.Network): The optimized PyPSA network containing the time-series data.
-        start_date (pd.Timestamp): The start date of the period to plot.
-        end_date (pd.Timestamp): The end date of the period to plot.
+    Returns:
+        pd.DataFrame: One column per flow (MW) and the grid price (€/MWh).
     """
-    # --- 1. Data Preparation and Filtering ---
     # NOTE: We assume the hydro storage reservoir is named 'Hydro Reservoir' and the
     # EV battery is 'Electric Car Battery'. Adjust here if your names differ.
     hydro_name = 'Hydro Reservoir'
     electric_car_battery_name = 'Electric Car Battery'
 
-    # Create a complete DataFrame with all necessary data
-    all_data = pd.DataFrame({
-        'Solar': n.generators_t.p['Solar'],
-        'Wind': n.generators_t.p['Wind'],
-        'Consumption': n.loads_t.p['Consumption'],
-        'Grid Sale': -n.links_t.p0['Grid Export'],
-        'Grid Purchase': -n.links_t.p1['Grid Import'],
-        'Biomass ORC': n.generators_t.p.get('Biomass ORC'),
+    generators_p = _window(n.generators_t.p, start_date, end_date)
+    p_dispatch = _window(n.storage_units_t.p_dispatch, start_date, end_date)
+    p_store = _window(n.storage_units_t.p_store, start_date, end_date)
+    grid = _window(grid_exchange(n), start_date, end_date)
+
+    # Create a DataFrame with all necessary data for the period only
+    return pd.DataFrame({
+        'Solar': generators_p['Solar'],
+        'Wind': generators_p['Wind'],
+        'Consumption': _window(n.loads_t.p, start_date, end_date)['Consumption'],
+        'Grid Sale': -grid['sale'],
+        'Grid Purchase': grid['purchase'],
+        'Biomass ORC': generators_p.get('Biomass ORC'),
         # ---- Additions for Hydro ----
-        'Hydro Dispatch': n.storage_units_t.p_dispatch[hydro_name],
-        'Reservoir Pumping': n.storage_units_t.p_store[hydro_name],
-        'Reservoir Inflow': n.storage_units_t.inflow[hydro_name],
+        'Hydro Dispatch': p_dispatch[hydro_name],
+        'Reservoir Pumping': p_store[hydro_name],
+        'Reservoir Inflow': _window(n.storage_units_t.inflow, start_date, end_date)[hydro_name],
         # ---- Additions for EV Battery ----
-        'EV Battery Dispatch': n.storage_units_t.p_dispatch[electric_car_battery_name],
-        'EV Battery Charge': n.storage_units_t.p_store[electric_car_battery_name],
+        'EV Battery Dispatch': p_dispatch[electric_car_battery_name],
+        'EV Battery Charge': p_store[electric_car_battery_name],
         # ------------------------------------
-        'Grid Price': n.links_t.marginal_cost['Grid Import']
+        'Grid Price': grid['purchase_price']
     })
 
-    # Select only the specified date range
-    plot_data = all_data.loc[start_date:end_date]
 
+def draw_energy_balance(plot_data, start_date, end_date, plot_market_price=True):
+    """
+    Draws the energy balance chart of the data returned by `energy_balance_data`.
+
+    Returns:
+        matplotlib.figure.Figure: The figure (neither shown nor saved).
+    """
     # --- 2. Figure Creation ---
     fig, ax = plt.subplots(figsize=(15, 7))
 
@@ -110,33 +128,55 @@ def plot_energy_balance(n, start_date, end_date, plot_market_price=True):
     lines2, labels2 = ax2.get_legend_handles_labels()
     ax.legend(lines + lines2, labels + labels2, loc='upper left', ncol=2)
 
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.show()
+    fig.tight_layout(rect=[0, 0, 1, 0.95])
+    return fig
+
 
+def _finish_figure(fig, show, save_path):
+    """Saves the figure if a path is given, then shows it or closes it."""
+    if save_path is not None:
+        fig.savefig(save_path)
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
 
-def plot_storage_operation(n, storage_name, start_date=None, end_date=None):
+
+# --- only function with hydro, biomass and electric car battery implemented ---
+def plot_energy_balance(n, start_date, end_date, plot_market_price=True, show=True, save_path=None):
     """
-    Affiche les données opérationnelles pour une unité de stockage d'énergie spécifique.
+    Plots an energy balance chart for a defined period.
 
-    Cette fonction visualise la charge, la décharge, l'apport (si existant) et
-    l'état de charge pour une période donnée.
+    This function generates a single figure showing the time evolution
+    of energy flows (production, consumption, grid exchanges, hydro)
+    and the grid price between a start and end date.
 
-    Paramètres :
-    -----------
-    n : pypsa.Network
-        Un objet réseau PyPSA résolu.
-    storage_name : str
-        Le nom de l'unité de stockage à afficher.
-    start_date : str, optionnel
-        La date de début pour filtrer les données (ex: '2022-03-10').
-    end_date : str, optionnel
-        La date de fin pour filtrer les données (ex: '2022-03-15').
+    Args:
+        n (pypsa.Network): The optimized PyPSA network containing the time-series data.
+        start_date (pd.Timestamp): The start date of the period to plot.
+        end_date (pd.Timestamp): The end date of the period to plot.
+        plot_market_price (bool): Whether to draw the grid price on the right axis.
+        show (bool): Whether to show the figure. If False, it is closed after being saved.
+        save_path (str, optional): File to save the figure to (PNG, SVG...).
     """
-    # --- 1. Récupération et préparation des données ---
-    fig, ax = plt.subplots(figsize=(15, 7))
+    # --- 1. Data Preparation and Filtering ---
+    plot_data = energy_balance_data(n, start_date, end_date)
+    fig = draw_energy_balance(plot_data, start_date, end_date, plot_market_price)
+    _finish_figure(fig, show, save_path)
+
+
+def storage_operation_data(n, storage_name, start_date=None, end_date=None):
+    """
+    Extrait les données tracées par `plot_storage_operation` pour une période.
+
+    Les séries sont découpées à la période avant d'être assemblées.
 
-    soc = n.storage_units_t.state_of_charge[storage_name]
-    dispatch = n.storage_units_t.p[storage_name]
+    Retourne :
+    ---------
+    (pd.DataFrame, list[str]) : Les données (kW, kWh) et les colonnes tracées en aires.
+    """
+    soc = _window(n.storage_units_t.state_of_charge[storage_name], start_date, end_date)
+    dispatch = _window(n.storage_units_t.p[storage_name], start_date, end_date)
     dispatch_kw = dispatch * 1000
 
     discharge = dispatch_kw.where(dispatch_kw > 0, 0)
@@ -151,20 +191,22 @@ def plot_storage_operation(n, storage_name, start_date=None, end_date=None):
     plot_columns = ["Discharge (kW)", "Charge (kW)"]
 
     if storage_name in n.storage_units_t.inflow.columns:
-        inflow = n.storage_units_t.inflow[storage_name]
+        inflow = _window(n.storage_units_t.inflow[storage_name], start_date, end_date)
         data["Inflow (kW)"] = inflow * 1000
         plot_columns.append("Inflow (kW)")
 
-    stats_df = pd.DataFrame(data)
+    return pd.DataFrame(data), plot_columns
 
-    # NOUVEAU : Filtrer le DataFrame en fonction des dates fournies
-    if start_date or end_date:
-        stats_df = stats_df.loc[start_date:end_date]
-        if stats_df.empty:
-            print(f"Attention : Aucune donnée trouvée pour la plage de dates spécifiée pour '{storage_name}'.")
-            return
 
-    # --- 2. Génération du graphique ---
+def draw_storage_operation(stats_df, plot_columns, storage_name):
+    """
+    Trace le graphique des données retournées par `storage_operation_data`.
+
+    Retourne :
+    ---------
+    matplotlib.figure.Figure : La figure (ni affichée ni enregistrée).
+    """
+    fig, ax = plt.subplots(figsize=(15, 7))
 
     # NOUVEAU : Palette de couleurs améliorée
     plot_colors = {
@@ -193,5 +235,142 @@ def plot_storage_operation(n, storage_name, start_date=None, end_date=None):
     ax.right_ax.legend(lines + lines2, labels + labels2, loc='upper right', frameon=True)
     ax.get_legend().remove()
 
-    plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    fig.tight_layout()
+    return fig
+
+
+def plot_storage_operation(n, storage_name, start_date=None, end_date=None, show=True, save_path=None):
+    """
+    Affiche les données opérationnelles pour une unité de stockage d'énergie spécifique.
+
+    Cette fonction visualise la charge, la décharge, l'apport (si existant) et
+    l'état de charge pour une période donnée.
+
+    Paramètres :
+    -----------
+    n : pypsa.Network
+        Un objet réseau PyPSA résolu.
+    storage_name : str
+        Le nom de l'unité de stockage à afficher.
+    start_date : str, optionnel
+        La date de début pour filtrer les données (ex: '2022-03-10').
+    end_date : str, optionnel
+        La date de fin pour filtrer les données (ex: '2022-03-15').
+    show : bool, optionnel
+        Affiche la figure. Si False, elle est fermée après l'enregistrement.
+    save_path : str, optionnel
+        Fichier dans lequel enregistrer la figure (PNG, SVG...).
+    """
+    # --- 1. Récupération et préparation des données (découpées à la période) ---
+    stats_df, plot_columns = storage_operation_data(n, storage_name, start_date, end_date)
+    if stats_df.empty:
+        print(f"Attention : Aucune donnée trouvée pour la plage de dates spécifiée pour '{storage_name}'.")
+        return
+
+    # --- 2. Génération du graphique ---
+    fig = draw_storage_operation(stats_df, plot_columns, storage_name)
+    _finish_figure(fig, show, save_path)
+
+
+def plot_pareto_frontier(frontier, show=True, save_path=None):
+    """
+    Plots the total annualised cost against the self-sufficiency of a frontier
+    computed by `solve_pareto_frontier` (see utils/pareto_frontier.py).
+    """
+    points = frontier[frontier['status'] == 'ok']
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.plot(points['self_sufficiency'] * 100, points['total_cost_k_eur'], marker='o')
+    ax.set_xlabel('Self-sufficiency (%)')
+    ax.set_ylabel('Total annualised cost (k€/year)')
+    ax.set_title('Cost versus grid independence')
+    ax.grid(True, linestyle='--', alpha=0.6)
+    fig.tight_layout()
+
+    _finish_figure(fig, show, save_path)
+    return fig
+
+
+# =============================================================================
+# --- Headless batch rendering ---
+# =============================================================================
+
+def weekly_windows(n, days=7):
+    """
+    Cuts the modelled period into consecutive windows of `days` days.
+
+    Returns:
+        list[tuple]: The (start_date, end_date) of each window.
+    """
+    starts = pd.date_range(n.snapshots[0], n.snapshots[-1], freq=pd.Timedelta(days=days))
+    step = pd.Timedelta(days=days) - (n.snapshots[1] - n.snapshots[0])
+    return [(start, min(start + step, n.snapshots[-1])) for start in starts]
+
+
+def _init_render_worker():
+    """Renders to files only: no window is ever opened by a worker."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render_figure(kind, plot_data, args, path, dpi):
+    """Draws one figure from already extracted data and saves it (worker process)."""
+    if kind == 'energy_balance':
+        fig = draw_energy_balance(plot_data, *args)
+    else:
+        fig = draw_storage_operation(plot_data, *args)
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+    return path
+
+
+def render_plot_batch(n, windows, output_dir, kind='energy_balance', storage_name=None, fmt='png',
+                      plot_market_price=True, dpi=100, max_workers=None):
+    """
+    Renders one plot per date window to image files, in parallel worker processes.
+
+    The data of every window is extracted from the network here, and only these
+    small tables are sent to the workers, which draw them with the Agg backend.
+
+    Args:
+        n (pypsa.Network): The optimized PyPSA network.
+        windows (list[tuple]): The (start_date, end_date) of each plot, e.g. from `weekly_windows`.
+        output_dir (str): Directory of the image files.
+        kind (str): 'energy_balance' or 'storage_operation'.
+        storage_name (str, optional): Storage unit plotted, for 'storage_operation'.
+        fmt (str): Image format, e.g. 'png' or 'svg'.
+        plot_market_price (bool): Whether to draw the grid price ('energy_balance').
+        dpi (int): Resolution of raster images.
+        max_workers (int, optional): Number of worker processes. Use 1 to render in this process.
+
+    Returns:
+        list[str]: The paths of the image files, in the order of `windows`.
+    """
+    if kind not in ('energy_balance', 'storage_operation'):
+        raise ValueError(f"Unknown plot kind '{kind}'. Choose 'energy_balance' or 'storage_operation'.")
+    if kind == 'storage_operation' and storage_name is None:
+        raise ValueError("A storage_name is needed to plot the storage operation.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for start_date, end_date in windows:
+        start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        name = f"{start_date:%Y%m%d}_{end_date:%Y%m%d}.{fmt}"
+        if kind == 'energy_balance':
+            plot_data = energy_balance_data(n, start_date, end_date)
+            args = (start_date, end_date, plot_market_price)
+            path = os.path.join(output_dir, f"energy_balance_{name}")
+        else:
+            plot_data, plot_columns = storage_operation_data(n, storage_name, start_date, end_date)
+            args = (plot_columns, storage_name)
+            path = os.path.join(output_dir, f"{storage_name.replace(' ', '_')}_{name}")
+        jobs.append((kind, plot_data, args, path, dpi))
+
+    if max_workers == 1:
+        # The figures are saved and closed without ever being shown.
+        return [_render_figure(*job) for job in jobs]
+
+    # 'spawn' rather than fork: the caller has often just run the solver, whose
+    # threads must not be copied into the workers.
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(_render_figure, *zip(*jobs)))
@@ -0,0 +1,107 @@
+# utils/model_resolve.py
+
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from utils.network_builder import (build_network, add_capex_budget_constraint, fixed_capex_cost,
+                                   solution_summary)
+
+
+def set_capex_budget(n, budget, params):
+    """
+    Changes the CAPEX budget of an existing model in place.
+
+    Only the right-hand side of `Global_CAPEX_budget_limit` is modified, so the
+    network and the Linopy model do not have to be rebuilt.
+
+    Args:
+        n (pypsa.Network): A network whose model (`n.model`) holds the budget constraint.
+        budget (float): The new budget in Euros (€).
+        params (dict): Model parameters the model was built with.
+    """
+    # The fixed investments were moved to the right-hand side by linopy.
+    n.model.constraints['Global_CAPEX_budget_limit'].rhs = budget - fixed_capex_cost(n, params)
+
+
+def resolve_model(n, solver_name="highs", solver_options=None, basis_path=None):
+    """
+    Solves the existing model of the network again.
+
+    Args:
+        n (pypsa.Network): A network whose model (`n.model`) has already been created.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+        basis_path (str, optional): File used to warm-start the solver. If it exists,
+                                    the solve starts from the basis it contains, and
+                                    the final basis is written back to it afterwards.
+
+    Returns:
+        tuple: The (status, condition) returned by the solver.
+    """
+    kwargs = {}
+    if basis_path is not None:
+        if os.path.exists(basis_path):
+            kwargs['warmstart_fn'] = basis_path
+        kwargs['basis_fn'] = basis_path
+    return n.optimize.solve_model(solver_name=solver_name, solver_options=solver_options or {}, **kwargs)
+
+
+def solve_budget_frontier(data, params, budgets, solver_name="highs", solver_options=None, warm_start=False):
+    """
+    Solves the model for a series of CAPEX budgets, building the network and the
+    Linopy model only once.
+
+    Each budget is applied by changing the right-hand side of the budget constraint.
+    With `warm_start`, every solve starts from the basis of the previous one, so
+    budgets should be given in increasing (or decreasing) order. HiGHS then skips
+    its presolve, which on the full year makes the solves slower, not faster: it
+    is off by default.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        budgets (list[float]): The CAPEX budgets to solve, in Euros (€).
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+        warm_start (bool): Whether to warm-start each solve from the previous basis.
+
+    Returns:
+        pd.DataFrame: One row per budget with the solver status, the total cost
+                      and the optimal capacities.
+    """
+    n = build_network(data, params)
+    m = n.optimize.create_model()
+    add_capex_budget_constraint(n, m, params)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        basis_path = os.path.join(tmp_dir, 'basis.bas') if warm_start else None
+        for budget in budgets:
+            print(f"Solving with a CAPEX budget of {budget:,.0f} €...")
+            set_capex_budget(n, budget, params)
+
+            start = time.perf_counter()
+            status, condition = resolve_model(n, solver_name, solver_options, basis_path)
+            row = {'CAPEX_BUDGET': budget, 'status': status, 'condition': condition,
+                   'solve_time_s': time.perf_counter() - start}
+            if status == 'ok':
+                row.update(solution_summary(n))
+            rows.append(row)
+
+    return pd.DataFrame(rows).set_index('CAPEX_BUDGET')
+
+
+if __name__ == '__main__':
+    # Example: budget frontier of the default scenario.
+    # Run from the project root directory: python -m utils.model_resolve
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.network_builder import prepare_model_data
+
+    params = get_model_parameters()
+    data = prepare_model_data(load_model_data(), params)
+    frontier = solve_budget_frontier(data, params, budgets=[1.5e5, 1.8e5, 2.5e5, 5e5, 1e6])
+    print(frontier)
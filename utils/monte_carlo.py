@@ -0,0 +1,216 @@
+# utils/monte_carlo.py
+
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils.model_param import get_model_parameters
+from utils.parameter_sweep import default_max_workers, worker_solver_options, worker_pool, solve_scenario
+
+# Uncertain parameters, as multipliers of their value in `utils/model_param.py`:
+# ('uniform', low, high), ('triangular', low, mode, high) or ('normal', mean, std).
+DEFAULT_DISTRIBUTIONS = {
+    'CAPEX_SOLAR_MW': ('triangular', 0.8, 1.0, 1.3),
+    'CAPEX_WIND_MW': ('triangular', 0.8, 1.0, 1.3),
+    'CAPEX_BIOMASS_MW': ('triangular', 0.8, 1.0, 1.4),
+    'CAPEX_HYDRO_MW': ('triangular', 0.8, 1.0, 1.4),
+    'OPEX_SOLAR_MW_YEAR': ('uniform', 0.8, 1.2),
+    'OPEX_WIND_MW_YEAR': ('uniform', 0.8, 1.2),
+    'OPEX_BIOMASS_MW_YEAR': ('uniform', 0.8, 1.2),
+    'OPEX_HYDRO_MW_YEAR': ('uniform', 0.8, 1.2),
+    'LIFE_SOLAR': ('uniform', 0.8, 1.2),
+    'LIFE_WIND': ('uniform', 0.8, 1.2),
+    'LIFE_ORC_Biomass': ('uniform', 0.8, 1.2),
+    'LIFE_HYDRO': ('uniform', 0.8, 1.2),
+    'WIND_CAPACITY_FACTOR': ('normal', 1.0, 0.1),
+    'ANNUAL_ENERGY_DEMAND': ('normal', 1.0, 0.05),
+}
+
+# Perturbation of the timeseries: relative standard deviation of the yearly level
+# and of the hourly noise.
+DEFAULT_SERIES_NOISE = {
+    'price_level_std': 0.15,
+    'price_noise_std': 0.05,
+    'demand_noise_std': 0.05,
+}
+
+# KPIs (see `compute_optimisation_kpis`) whose confidence intervals decide when to stop.
+DEFAULT_CONVERGENCE_KPIS = ['total_cost_k_eur', 'total_investment_k_eur', 'p_nom_solar_mw', 'p_nom_wind_mw']
+
+
+def sample_parameters(rng, distributions=None):
+    """
+    Draws one set of model parameters.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        distributions (dict, optional): Distribution of the multiplier of each
+                                        parameter (default: `DEFAULT_DISTRIBUTIONS`).
+
+    Returns:
+        dict: Overrides for `get_model_parameters`.
+    """
+    nominal = get_model_parameters()
+    overrides = {}
+    for name, (kind, *args) in (distributions or DEFAULT_DISTRIBUTIONS).items():
+        if kind == 'uniform':
+            factor = rng.uniform(*args)
+        elif kind == 'triangular':
+            factor = rng.triangular(*args)
+        elif kind == 'normal':
+            factor = rng.normal(*args)
+        else:
+            raise ValueError(f"Unknown distribution '{kind}' for '{name}'.")
+        # A negative cost, lifetime or demand makes no sense.
+        overrides[name] = nominal[name] * max(factor, 0.01)
+    return overrides
+
+
+def perturb_timeseries(data, seed, series_noise=None):
+    """
+    Returns a copy of the loaded timeseries with a perturbed grid price and demand.
+
+    The price is scaled by a random yearly level and both series get a random
+    hourly noise. The demand keeps its annual total, which is set by
+    `ANNUAL_ENERGY_DEMAND` when the data is prepared.
+
+    Args:
+        data (pd.DataFrame): Timeseries data as returned by `load_model_data`.
+        seed (int): Seed of the perturbation, so that a sample can be reproduced.
+        series_noise (dict, optional): See `DEFAULT_SERIES_NOISE`.
+    """
+    noise = {**DEFAULT_SERIES_NOISE, **(series_noise or {})}
+    rng = np.random.default_rng(seed)
+    data = data.copy()
+
+    level = max(rng.normal(1.0, noise['price_level_std']), 0.01)
+    hourly = np.clip(rng.normal(1.0, noise['price_noise_std'], len(data)), 0, None)
+    data['grid_price_eur_per_mwh'] = data['grid_price_eur_per_mwh'] * level * hourly
+
+    hourly = np.clip(rng.normal(1.0, noise['demand_noise_std'], len(data)), 0, None)
+    data['consumption_kwh'] = data['consumption_kwh'] * hourly
+    return data
+
+
+def convergence_statistics(samples, kpis=None, confidence_z=1.96):
+    """
+    Returns the mean and the confidence interval of the mean of each KPI over the
+    successful samples.
+
+    Args:
+        samples (pd.DataFrame): Rows returned by the solved samples.
+        kpis (list[str], optional): KPIs to report (default: `DEFAULT_CONVERGENCE_KPIS`).
+        confidence_z (float): Normal quantile of the interval (1.96 for 95%).
+
+    Returns:
+        pd.DataFrame: One row per KPI with the number of samples, the mean, the
+                      standard deviation and the (relative) half-width of the interval.
+    """
+    kpis = kpis or DEFAULT_CONVERGENCE_KPIS
+    ok = samples[samples['status'] == 'ok']
+    count = len(ok)
+    stats = pd.DataFrame({'samples': count,
+                          'mean': ok[kpis].mean(),
+                          'std': ok[kpis].std(ddof=1) if count > 1 else np.nan})
+    stats['half_width'] = confidence_z * stats['std'] / np.sqrt(max(count, 1))
+    stats['relative_half_width'] = stats['half_width'] / stats['mean'].abs().replace(0, np.nan)
+    return stats
+
+
+def _is_converged(stats, rel_tolerance, abs_tolerance):
+    # KPIs that are always (close to) zero, e.g. an unused technology, only need
+    # a small absolute interval.
+    converged = (stats['relative_half_width'] <= rel_tolerance) | (stats['half_width'] <= abs_tolerance)
+    return bool(converged.all())
+
+
+def run_monte_carlo(max_samples=200, min_samples=20, batch_size=None, rel_tolerance=0.01, abs_tolerance=1e-3,
+                    kpis=None, distributions=None, series_noise=None, seed=0,
+                    data_path='data/model_timeseries.csv', max_workers=None, threads_per_worker=1,
+                    solver_name="highs", solver_options=None):
+    """
+    Solves random samples of the uncertain inputs in parallel until the confidence
+    intervals of the KPIs are tight enough.
+
+    Samples are solved in batches. After each batch, the confidence interval of
+    the mean of every KPI in `kpis` is computed, and sampling stops once all of
+    them are within `rel_tolerance` of the mean (and at least `min_samples` were
+    solved), or after `max_samples` samples.
+
+    Args:
+        max_samples (int): Maximum number of samples.
+        min_samples (int): Minimum number of samples before checking convergence.
+        batch_size (int, optional): Samples solved between two convergence checks
+                                    (default: twice the number of workers).
+        rel_tolerance (float): Target half-width of the intervals, relative to the mean.
+        abs_tolerance (float): Half-width under which a KPI is converged anyway.
+        kpis (list[str], optional): KPIs checked for convergence.
+        distributions (dict, optional): See `DEFAULT_DISTRIBUTIONS`.
+        series_noise (dict, optional): See `DEFAULT_SERIES_NOISE`.
+        seed (int): Seed of the sampling.
+        data_path (str): Path to the model timeseries CSV file.
+        max_workers (int, optional): Number of worker processes. Defaults to the
+                                     number of CPUs divided by `threads_per_worker`.
+        threads_per_worker (int): Maximum number of threads used by each solve.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Extra solver options applied to every sample.
+
+    Returns:
+        tuple:
+            - pd.DataFrame: One row per sample with its inputs, status and KPIs.
+            - pd.DataFrame: The convergence statistics after each batch.
+    """
+    max_workers = max_workers or default_max_workers(threads_per_worker)
+    batch_size = batch_size or 2 * max_workers
+    options = worker_solver_options(threads_per_worker, solver_options)
+
+    rng = np.random.default_rng(seed)
+    rows, history = [], []
+    print(f"--- Monte Carlo: up to {max_samples} samples on {max_workers} workers ---")
+
+    with worker_pool(max_workers, data_path) as executor:
+        while len(rows) < max_samples:
+            batch = []
+            for sample_id in range(len(rows), min(len(rows) + batch_size, max_samples)):
+                overrides = sample_parameters(rng, distributions)
+                series_seed = int(rng.integers(2**31))
+                perturb = partial(perturb_timeseries, seed=series_seed, series_noise=series_noise)
+                batch.append(executor.submit(solve_scenario, {'sample': sample_id, 'seed': series_seed}, overrides,
+                                             solver_name, options, transform_data=perturb))
+            rows.extend(future.result() for future in batch)
+
+            stats = convergence_statistics(pd.DataFrame(rows), kpis)
+            history.append(stats.assign(total_samples=len(rows)))
+            widest = stats['relative_half_width'].max()
+            print(f"{len(rows)} samples ({stats['samples'].iloc[0]} solved): "
+                  f"widest relative half-width {widest:.2%}")
+
+            if len(rows) >= min_samples and _is_converged(stats, rel_tolerance, abs_tolerance):
+                print(f"Converged after {len(rows)} samples.")
+                break
+
+    samples = pd.DataFrame(rows).set_index('sample')
+    convergence = pd.concat(history).rename_axis('kpi').reset_index()
+    return samples, convergence
+
+
+def summarize_samples(samples, kpis=None, percentiles=(0.05, 0.5, 0.95)):
+    """
+    Returns the distribution of each KPI over the successful samples.
+
+    Returns:
+        pd.DataFrame: Mean, standard deviation and percentiles of each KPI.
+    """
+    kpis = kpis or DEFAULT_CONVERGENCE_KPIS
+    ok = samples[samples['status'] == 'ok']
+    return ok[kpis].describe(percentiles=list(percentiles)).T
+
+
+if __name__ == '__main__':
+    # Example: uncertainty of the default scenario.
+    # Run from the project root directory: python -m utils.monte_carlo
+    samples, convergence = run_monte_carlo(max_samples=100, min_samples=10, rel_tolerance=0.02)
+    samples.to_csv('monte_carlo_samples.csv')
+    print("\n--- KPI distributions ---")
+    print(summarize_samples(samples).round(3))
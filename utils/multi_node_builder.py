@@ -0,0 +1,249 @@
+# utils/multi_node_builder.py
+
+import numpy as np
+import pandas as pd
+import pypsa
+
+from utils.data_loader import infer_time_step
+from utils.network_builder import add_grid_connection, add_investment_budget_constraint
+
+# Order in which the component types are added (buses are added first).
+COMPONENT_ORDER = ['Load', 'Generator', 'StorageUnit', 'Store', 'Link', 'Line']
+
+
+def add_components(n, component, static, timeseries=None):
+    """
+    Adds all the assets of one component type with a single `n.add` call.
+
+    Args:
+        n (pypsa.Network): The network.
+        component (str): PyPSA component type, e.g. 'Generator'.
+        static (pd.DataFrame): One row per asset (index = names), one column per
+                               PyPSA attribute, e.g. 'bus', 'p_nom', 'capital_cost'.
+        timeseries (dict, optional): Maps a time-varying attribute (e.g. 'p_max_pu')
+                                     to a DataFrame with one column per asset.
+    """
+    names = static.index
+    attrs = {attr: static[attr] for attr in static.columns}
+    for attr, df in (timeseries or {}).items():
+        # PyPSA needs the columns in the same order as the names.
+        attrs[attr] = df[names]
+    n.add(component, names, **attrs)
+
+
+def build_multi_node_network(snapshots, buses, components, timeseries=None, grid_bus=None,
+                             grid_price=None, grid_export_limit=None):
+    """
+    Builds a network with many buses from tables of components.
+
+    Args:
+        snapshots (pd.DatetimeIndex): Snapshots of the model.
+        buses (pd.DataFrame): One row per bus (index = names), with optional PyPSA
+                              attributes as columns (e.g. 'x', 'y', 'carrier').
+        components (dict): Maps a component type ('Load', 'Generator', 'StorageUnit',
+                           'Store', 'Link', 'Line') to its table, see `add_components`.
+        timeseries (dict, optional): Maps a (component type, attribute) pair to a
+                                     DataFrame with one column per asset.
+        grid_bus (str, optional): Bus connected to the external grid, if any.
+        grid_price (pd.Series, optional): Purchase price of the grid electricity (€/MWh).
+        grid_export_limit (float, optional): Maximum power sold to the grid (MW).
+
+    Returns:
+        pypsa.Network: The network, ready for `n.optimize.create_model()`.
+    """
+    timeseries = timeseries or {}
+    n = pypsa.Network()
+    n.set_snapshots(snapshots)
+    # As in `build_network`: each snapshot lasts the time step of the data.
+    n.snapshot_weightings.loc[:, :] = infer_time_step(snapshots)
+
+    add_components(n, 'Bus', buses)
+    for component in COMPONENT_ORDER:
+        static = components.get(component)
+        if static is None or static.empty:
+            continue
+        series = {attr: df for (c, attr), df in timeseries.items() if c == component}
+        add_components(n, component, static, series)
+
+    if grid_bus is not None:
+        add_grid_connection(n, grid_bus, grid_price, grid_export_limit)
+    return n
+
+
+def _repeat(series, names):
+    """One column per name, all equal to `series`."""
+    return pd.DataFrame(np.repeat(series.to_numpy()[:, None], len(names), axis=1),
+                        index=series.index, columns=names)
+
+
+def community_components(nodes, data, params, consumption, feeders=None, hydro_inflow=None):
+    """
+    Lays out the technologies of the single-node model at every node of a community.
+
+    Every node gets its load and candidate Wind, Solar and Biomass ORC generators
+    (same weather and prices everywhere). Nodes with a hydro plant or V2G chargers
+    get these storage units too. Neighbouring nodes are connected by feeders,
+    modelled as bidirectional links.
+
+    Args:
+        nodes (pd.DataFrame): One row per node (index = bus names), with the optional
+                              columns 'hydro_p_nom_mw' and 'ev_chargers'.
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        consumption (pd.DataFrame): Demand of each node (MW), one column per node.
+        feeders (pd.DataFrame, optional): One row per connection, with the columns
+                                          'bus0', 'bus1' and 'p_nom' (MW).
+        hydro_inflow (pd.DataFrame, optional): Inflow of each hydro plant (MW), one
+                                               column per node with a plant. Defaults
+                                               to the inflow of the data.
+
+    Returns:
+        tuple:
+            - dict: The component tables, see `build_multi_node_network`.
+            - dict: The time-varying attributes, see `build_multi_node_network`.
+            - pd.Series: The investment cost (€/MW) of the assets in the CAPEX budget.
+    """
+    node_names = nodes.index
+    components, timeseries, capex = {}, {}, []
+
+    # --- Loads ---
+    load_names = 'Consumption ' + node_names
+    components['Load'] = pd.DataFrame({'bus': node_names}, index=load_names)
+    timeseries[('Load', 'p_set')] = consumption[node_names].set_axis(load_names, axis=1)
+
+    # --- Generators: one of each technology per node ---
+    technologies = {
+        # name: (capital cost (€/MW/year), investment (€/MW))
+        'Wind': (params['capital_cost_wind'], params['CAPEX_WIND_MW']),
+        'Solar': (params['capital_cost_solar'], params['CAPEX_SOLAR_MW']),
+        'Biomass ORC': (params['capital_cost_ORC_Biomass'], params['CAPEX_BIOMASS_MW']),
+    }
+    generators = []
+    for technology, (capital_cost, investment) in technologies.items():
+        names = technology + ' ' + node_names
+        generators.append(pd.DataFrame({'bus': node_names, 'p_nom_extendable': True,
+                                        'capital_cost': capital_cost}, index=names))
+        capex.append(pd.Series(investment, index=names))
+    components['Generator'] = pd.concat(generators)
+
+    wind, solar, biomass = [technology + ' ' + node_names for technology in technologies]
+    p_max_pu = pd.concat([_repeat(data['wind_capacity_factor'], wind),
+                          _repeat(data['solar_capacity_factor'], solar)], axis=1)
+    # Biomass ORC is dispatchable: no p_max_pu profile, only the heat by-product revenue.
+    ones = _repeat(pd.Series(1.0, index=data.index), biomass)
+    timeseries[('Generator', 'p_max_pu')] = pd.concat([p_max_pu, ones], axis=1)
+    timeseries[('Generator', 'marginal_cost')] = pd.concat([
+        _repeat(pd.Series(0.0, index=data.index), wind.append(solar)),
+        _repeat(-4 * 0.55 * data['grid_price_eur_per_mwh'], biomass)], axis=1)
+
+    # --- Storage units: hydro plants and V2G chargers ---
+    storage, inflow_names = [], []
+    hydro_nodes = node_names[nodes.get('hydro_p_nom_mw', pd.Series(0, index=node_names)) > 0]
+    if len(hydro_nodes):
+        names = 'Hydro Reservoir ' + hydro_nodes
+        storage.append(pd.DataFrame({
+            'bus': hydro_nodes,
+            'p_nom': nodes.loc[hydro_nodes, 'hydro_p_nom_mw'].to_numpy(),
+            'p_nom_extendable': not params['IS_HYDRO_FIXED'],
+            'capital_cost': params['capital_cost_hydro'],
+            'p_min_pu': -params['PUMPING_HYDRO'],
+            'max_hours': params['RESERVOIR_CAPACITY_HYDRO'],
+            'cyclic_state_of_charge': True,
+        }, index=names))
+        capex.append(pd.Series(params['CAPEX_HYDRO_MW'], index=names))
+        if hydro_inflow is None:
+            hydro_inflow = _repeat(data['hydro_inflow_kwh'] / 1000, hydro_nodes)
+        inflow_names = names
+
+    ev_nodes = node_names[nodes.get('ev_chargers', pd.Series(0, index=node_names)) > 0]
+    if len(ev_nodes):
+        chargers = nodes.loc[ev_nodes, 'ev_chargers'].to_numpy()
+        storage.append(pd.DataFrame({
+            'bus': ev_nodes,
+            'p_nom': chargers * params['max_power_per_charger'],
+            'p_nom_extendable': False,
+            'capital_cost': 0,
+            'max_hours': params['mean_electric_car_capacity'] / params['max_power_per_charger'],
+        }, index='Electric Car Battery ' + ev_nodes))
+
+    if storage:
+        components['StorageUnit'] = pd.concat(storage)
+        # Units without inflow (the EV batteries) get a zero inflow.
+        inflow = pd.DataFrame(0.0, index=data.index, columns=components['StorageUnit'].index)
+        if len(inflow_names):
+            inflow[inflow_names] = hydro_inflow[hydro_nodes].to_numpy()
+        timeseries[('StorageUnit', 'inflow')] = inflow
+
+    # --- Feeders between nodes ---
+    if feeders is not None and not feeders.empty:
+        components['Link'] = pd.DataFrame({
+            'bus0': feeders['bus0'].to_numpy(),
+            'bus1': feeders['bus1'].to_numpy(),
+            'p_nom': feeders['p_nom'].to_numpy(),
+            'p_min_pu': -1,  # Power can flow both ways
+        }, index='Feeder ' + feeders['bus0'] + '-' + feeders['bus1'])
+
+    return components, timeseries, pd.concat(capex)
+
+
+def solve_multi_node_network(n, capex, budget, solver_name="highs", solver_options=None):
+    """
+    Creates the optimization model with the CAPEX budget over all the nodes and solves it.
+
+    Args:
+        n (pypsa.Network): The network built by `build_multi_node_network`.
+        capex (pd.Series): Investment cost (€/MW) of the assets in the budget.
+        budget (float): The CAPEX budget in Euros (€).
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+
+    Returns:
+        tuple: The (status, condition) returned by the solver.
+    """
+    m = n.optimize.create_model()
+    add_investment_budget_constraint(n, m, capex, budget)
+    return n.optimize.solve_model(solver_name=solver_name, solver_options=solver_options or {})
+
+
+def example_community(data, params):
+    """
+    Builds the example community: the demand of Castanheira de Pera split over three
+    feeders, with the hydro plant, the V2G chargers and the grid connection on the first one.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+
+    Returns:
+        tuple: The network and the investment cost (€/MW) of the assets in the CAPEX budget.
+    """
+    nodes = pd.DataFrame({'hydro_p_nom_mw': [0.03, 0, 0], 'ev_chargers': [params['number_of_chargers'], 0, 0],
+                          'demand_share': [0.5, 0.3, 0.2]},
+                         index=pd.Index(['Centre', 'North', 'South'], name='Bus'))
+    consumption = pd.DataFrame(np.outer(data['consumption_mwh'], nodes['demand_share']),
+                               index=data.index, columns=nodes.index)
+    feeders = pd.DataFrame({'bus0': ['Centre', 'Centre'], 'bus1': ['North', 'South'], 'p_nom': [0.2, 0.2]})
+
+    components, timeseries, capex = community_components(nodes, data, params, consumption, feeders)
+    n = build_multi_node_network(data.index, nodes[[]], components, timeseries, grid_bus='Centre',
+                                 grid_price=data['grid_price_eur_per_mwh'],
+                                 grid_export_limit=params['GRID_INJECTION_LIMIT'] * consumption.sum(axis=1).max())
+    return n, capex
+
+
+if __name__ == '__main__':
+    # Example: see `example_community`.
+    # Run from the project root directory: python -m utils.multi_node_builder
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.network_builder import prepare_model_data
+
+    params = get_model_parameters()
+    data = prepare_model_data(load_model_data(), params)
+
+    n, capex = example_community(data, params)
+    status, condition = solve_multi_node_network(n, capex, params['CAPEX_BUDGET'])
+
+    print(f"\nOptimization Status: {status}, Condition: {condition}")
+    print(f"Total annualized cost: {n.objective / 1e3:.2f} k€/year")
+    print(n.generators.p_nom_opt[capex.index.intersection(n.generators.index)].round(3))
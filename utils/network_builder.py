@@ -0,0 +1,392 @@
+# utils/network_builder.py
+
+import pandas as pd
+import pypsa
+import xarray as xr
+
+from utils.data_loader import infer_time_step
+
+# Capacity variable and attribute of each component type that can be extendable.
+CAPACITY_VARIABLES = {
+    'generators': ('Generator-p_nom', 'p_nom'),
+    'storage_units': ('StorageUnit-p_nom', 'p_nom'),
+    'links': ('Link-p_nom', 'p_nom'),
+    'lines': ('Line-s_nom', 's_nom'),
+    'stores': ('Store-e_nom', 'e_nom'),
+}
+
+
+def prepare_model_data(data, params):
+    """
+    Adds the model-ready columns to the loaded timeseries data.
+
+    The consumption profile is converted to MWh and scaled so that its annual sum
+    equals `ANNUAL_ENERGY_DEMAND`, and the wind capacity factor is scaled by
+    `WIND_CAPACITY_FACTOR`. The consumption and the hydro inflow, energies per
+    time step in the input file, become energies per hour (mean powers).
+
+    Args:
+        data (pd.DataFrame): Timeseries data as returned by `load_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+
+    Returns:
+        pd.DataFrame: A copy of the data with the scaled columns.
+    """
+    data = data.copy()
+    step = infer_time_step(data.index)
+
+    # Define the annual energy demand in mWh
+    data['consumption_mwh'] = (data['consumption_kwh'] / 1000)
+    # autoscale the consumption to the annual demand
+    auto_factor = params['ANNUAL_ENERGY_DEMAND'] / data['consumption_mwh'].sum()
+    # The network uses mean powers: the energy of each time step is divided by its
+    # length (MWh per hour, i.e. MW). Hourly data is unchanged.
+    data['consumption_mwh'] = auto_factor * data['consumption_mwh'] / step
+    data['hydro_inflow_kwh'] = data['hydro_inflow_kwh'] / step
+
+    # multiply wind power capacity factor (good zone)
+    data['wind_capacity_factor'] = params['WIND_CAPACITY_FACTOR'] * data['wind_capacity_factor']
+
+    return data
+
+
+def keep_export_limit(params, data, reduced):
+    """
+    Returns the parameters with `GRID_INJECTION_LIMIT` scaled so that a network
+    built on `reduced` data (resampled, representative periods...) keeps the
+    export limit of the full `data`.
+
+    The limit is a multiple of the peak consumption, which averaging lowers and
+    representative periods usually miss.
+    """
+    peak_ratio = data['consumption_mwh'].max() / reduced['consumption_mwh'].max()
+    return dict(params, GRID_INJECTION_LIMIT=params['GRID_INJECTION_LIMIT'] * peak_ratio)
+
+
+def add_grid_connection(n, bus, grid_price, export_limit):
+    """
+    Connects a bus of the community to the external grid.
+
+    Args:
+        n (pypsa.Network): The network.
+        bus (str): The bus at the point of connection with the grid.
+        grid_price (pd.Series): Purchase price of the electricity (€/MWh) at each snapshot.
+        export_limit (float): Maximum power sold back to the grid (MW).
+    """
+    # Create a bus to represent the external grid (infinite source/sink)
+    n.add("Bus", "Grid")
+
+    # Link for PURCHASING (Importing) electricity
+    # Flow from "Grid" to the community
+    n.add("Link", "Grid Import",
+          bus0="Grid",
+          bus1=bus,
+          p_nom=1e9,  # Infinite import capacity
+          p_min_pu=0,
+          marginal_cost=grid_price)  # Purchase price in €/MWh
+
+    # Link for SELLING (Exporting) electricity
+    # Flow from the community to "Grid"
+    n.add("Link", "Grid Export",
+          bus0=bus,
+          bus1="Grid",
+          p_nom=export_limit,
+          p_min_pu=0,
+          marginal_cost=-0.9 * grid_price) # Negative cost represents revenue
+
+    # Add a "slack" generator to the grid bus to balance the whole system
+    n.add("Generator",
+          "Grid Slack Source",
+          bus="Grid",
+          control='Slack',
+          p_nom=1e9,   # Infinite capacity
+          p_min_pu=-1, # Can both generate and consume energy
+          marginal_cost=0)
+
+
+def add_compact_grid_connection(n, bus, grid_price, export_limit, import_limit):
+    """
+    Connects a bus of the community to the external grid with two generators on
+    the bus itself, without the `Grid` bus, its slack generator and its balance
+    constraints. The costs and flows are the same as with `add_grid_connection`.
+
+    Args:
+        n (pypsa.Network): The network.
+        bus (str): The bus at the point of connection with the grid.
+        grid_price (pd.Series): Purchase price of the electricity (€/MWh) at each snapshot.
+        export_limit (float): Maximum power sold back to the grid (MW).
+        import_limit (float): Maximum power bought from the grid (MW), see `grid_import_bound`.
+    """
+    # PURCHASING (Importing) electricity
+    n.add("Generator", "Grid Import",
+          bus=bus,
+          p_nom=import_limit,
+          marginal_cost=grid_price)  # Purchase price in €/MWh
+
+    # SELLING (Exporting) electricity: a generator with a negative output
+    n.add("Generator", "Grid Export",
+          bus=bus,
+          p_nom=export_limit,
+          p_min_pu=-1,
+          p_max_pu=0,
+          marginal_cost=0.9 * grid_price)  # Negative output: the cost is a revenue
+
+
+def grid_import_bound(n, params, export_limit):
+    """
+    Returns an upper bound of the power bought from the grid (MW), derived from
+    the components of the community bus.
+
+    The community never buys more than it can use at once: its peak demand, the
+    charging power of its storage units and the power it can sell back at the
+    same time. Extendable storage units are bounded by the CAPEX budget.
+
+    Args:
+        n (pypsa.Network): The network, with its loads and storage units.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        export_limit (float): Maximum power sold back to the grid (MW).
+    """
+    storage = n.storage_units
+    max_p_nom = storage.p_nom_max.clip(upper=params['CAPEX_BUDGET'] / capex_per_mw(params).reindex(storage.index))
+    p_nom = storage.p_nom.where(~storage.p_nom_extendable, max_p_nom)
+    charging = (p_nom * -storage.p_min_pu).sum()
+
+    bound = n.loads_t.p_set.sum(axis=1).max() + charging + export_limit
+    # An extendable unit without a budget or a maximum keeps the usual "infinite" import.
+    return min(bound, 1e9)
+
+
+def grid_exchange(n):
+    """
+    Returns the power exchanged with the grid at each snapshot, for both grid
+    connections (`add_grid_connection` and `add_compact_grid_connection`).
+
+    Returns:
+        pd.DataFrame: Power bought ('purchase') and sold ('sale') in MW, both
+                      positive, with the purchase and sale prices (€/MWh).
+    """
+    if 'Grid Import' in n.links.index:
+        return pd.DataFrame({
+            'purchase': -n.links_t.p1['Grid Import'],
+            'sale': n.links_t.p0['Grid Export'],
+            'purchase_price': n.links_t.marginal_cost['Grid Import'],
+            # The export link has a negative marginal cost: its cost is a revenue.
+            'sale_price': -n.links_t.marginal_cost['Grid Export'],
+        })
+    return pd.DataFrame({
+        'purchase': n.generators_t.p['Grid Import'],
+        'sale': -n.generators_t.p['Grid Export'],
+        'purchase_price': n.generators_t.marginal_cost['Grid Import'],
+        'sale_price': n.generators_t.marginal_cost['Grid Export'],
+    })
+
+
+def build_network(data, params):
+    """
+    Builds the PyPSA network of the energy community.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict or Scenario): Model parameters, as returned by `get_model_parameters`
+                                   or a `Scenario` (see utils/scenario.py).
+
+    Returns:
+        pypsa.Network: The network, ready for `n.optimize.create_model()`.
+    """
+    n = pypsa.Network()
+    n.set_snapshots(data.index)
+    # Each snapshot lasts the time step of the data (e.g. 0.25 h for 15-minute data),
+    # so that energies and costs are powers times durations. Networks on resampled
+    # or representative periods get their own weightings afterwards.
+    n.snapshot_weightings.loc[:, :] = infer_time_step(data.index)
+
+    # Add the local electrical bus (node)
+    n.add("Bus", "Castanheira de Pera")
+
+    # Add the load (consumption) to the bus
+    n.add("Load", "Consumption",
+          bus="Castanheira de Pera",
+          p_set=data['consumption_mwh'])
+
+    ## ------------------ Renewable Generation ------------------
+    # Wind (capacity to be optimized)
+    n.add("Generator", "Wind",
+          bus="Castanheira de Pera",
+          p_nom_extendable=True,
+          capital_cost=params['capital_cost_wind'],
+          marginal_cost=0,
+          p_max_pu=data['wind_capacity_factor'])
+
+    # Solar (capacity to be optimized)
+    n.add("Generator", "Solar",
+          bus="Castanheira de Pera",
+          p_nom_extendable=True,
+          capital_cost=params['capital_cost_solar'],
+          marginal_cost=0,
+          p_max_pu=data['solar_capacity_factor'])
+
+    # Biomass ORC (capacity to be optimized)
+    # produce 4 time more heat than electricity...
+    # this model assume we sell the heat as a by-product to take it into account.
+    # Assume we sell heat (natural gas price) at 55% the price of the electricity
+    # Assume also 80% efficiency for the ORC heat system. (heat distribution efficiency)
+    # 0.8 * 4 * 0.6 = 1.92
+    n.add("Generator", "Biomass ORC",
+          bus="Castanheira de Pera",
+          p_nom_extendable=True,
+          capital_cost=params['capital_cost_ORC_Biomass'],
+          marginal_cost=- 4 * 0.55 * data["grid_price_eur_per_mwh"]) # Negative cost can represent revenue from by-products like heat
+
+    ## ------------------ Storage Units ------------------
+    # Hydro Reservoir (modeled as a StorageUnit)
+    n.add("StorageUnit", "Hydro Reservoir",
+          bus="Castanheira de Pera",
+          p_nom=30 / 1000,                # 30kW if fixed power capacity
+          p_nom_extendable=not params['IS_HYDRO_FIXED'], # Capacity is fixed if IS_HYDRO_FIXED is True
+          capital_cost=params['capital_cost_hydro'],
+          marginal_cost=0,                # Assumed low operational cost
+          p_min_pu=-params['PUMPING_HYDRO'],           # 0 = Cannot consume power (no pumping)
+          inflow=data['hydro_inflow_kwh'] / 1000, # Natural recharge from river/rain
+          max_hours=params['RESERVOIR_CAPACITY_HYDRO'], # Reservoir size in hours at full power
+          cyclic_state_of_charge=True)    # Ensure reservoir level is same at year end
+
+    # Electric Car Battery (Vehicle-to-Grid)
+    n.add("StorageUnit", "Electric Car Battery",
+          bus="Castanheira de Pera",
+          p_nom=params['power_electric_car'],       # Total power of the chargers
+          p_nom_extendable=False,         # Not optimized, considered as existing infrastructure
+          capital_cost=0,                 # Assumed to be already installed
+          marginal_cost=0,                # Negligible operating cost
+          max_hours=params['battery_capacity_electric_car_hours']) # Storage capacity in hours at p_nom
+
+    ## ------------------ Grid Connection ------------------
+    export_limit = params['GRID_INJECTION_LIMIT'] * max(data['consumption_mwh'])
+    if params['COMPACT_GRID_INTERFACE']:
+        add_compact_grid_connection(n, "Castanheira de Pera", data['grid_price_eur_per_mwh'], export_limit,
+                                    import_limit=grid_import_bound(n, params, export_limit))
+    else:
+        add_grid_connection(n, "Castanheira de Pera", data['grid_price_eur_per_mwh'], export_limit)
+
+    return n
+
+
+def fixed_capex_cost(n, params):
+    """
+    Returns the investment cost of the assets with a fixed capacity that count
+    towards the CAPEX budget (the hydro plant when `IS_HYDRO_FIXED` is True).
+
+    Linopy moves this constant to the right-hand side of `Global_CAPEX_budget_limit`.
+    """
+    if not params['IS_HYDRO_FIXED']:
+        return 0
+    hydro_capacity_mw = n.storage_units.at['Hydro Reservoir', 'p_nom']
+    return hydro_capacity_mw * params['CAPEX_HYDRO_MW']
+
+
+def solution_summary(n):
+    """
+    Returns the main results of a solved network as a flat dictionary
+    (total cost, optimal capacities and annual energies).
+
+    Energies are weighted by the snapshot weightings, so that they remain annual
+    values when the network only covers representative periods.
+    """
+    weightings = n.snapshot_weightings.generators
+    summary = {'total_cost_eur': n.objective}
+    for name in ['Solar', 'Wind', 'Biomass ORC']:
+        summary[f'p_nom_{name}_mw'] = n.generators.p_nom_opt[name]
+        summary[f'energy_{name}_mwh'] = (n.generators_t.p[name] * weightings).sum()
+    summary['p_nom_Hydro Reservoir_mw'] = n.storage_units.p_nom_opt['Hydro Reservoir']
+    grid = grid_exchange(n)
+    summary['grid_import_mwh'] = (grid['purchase'] * weightings).sum()
+    summary['grid_export_mwh'] = (grid['sale'] * weightings).sum()
+    return summary
+
+
+def capex_per_mw(params):
+    """
+    Returns the investment cost (€/MW) of each asset counted in the CAPEX budget.
+
+    The EV batteries are existing private assets and do not count.
+    """
+    return pd.Series({
+        'Wind': params['CAPEX_WIND_MW'],
+        'Solar': params['CAPEX_SOLAR_MW'],
+        'Biomass ORC': params['CAPEX_BIOMASS_MW'],
+        'Hydro Reservoir': params['CAPEX_HYDRO_MW'],
+    })
+
+
+def add_investment_budget_constraint(n, m, capex, budget, name="Global_CAPEX_budget_limit"):
+    """
+    Adds a budget constraint on the investment cost of a set of assets, built
+    with one vectorised expression per component type.
+
+    The capacity of each extendable asset is a variable; the cost of the assets
+    with a fixed capacity is a constant, subtracted from the budget.
+
+    Args:
+        n (pypsa.Network): The network the model was created from.
+        m (linopy.Model): The model returned by `n.optimize.create_model()`.
+        capex (pd.Series): Investment cost (€/MW) of each asset in the budget, by name.
+                           Assets that are not listed do not count.
+        budget (float): The budget in Euros (€).
+        name (str): Name of the constraint.
+
+    Returns:
+        linopy.Constraint: The constraint, or None if no listed asset is extendable.
+    """
+    lhs, fixed_cost = 0, 0.0
+    for list_name, (variable, attr) in CAPACITY_VARIABLES.items():
+        static = getattr(n, list_name)
+        costs = capex.reindex(static.index).dropna()
+        if costs.empty:
+            continue
+
+        extendable = static.loc[costs.index, f'{attr}_extendable'].to_numpy()
+        fixed_cost += (static.loc[costs.index[~extendable], attr] * costs[~extendable]).sum()
+
+        names = costs.index[extendable]
+        if len(names) and variable in m.variables:
+            capacity = m.variables[variable]
+            dim = capacity.dims[0]
+            weights = xr.DataArray(costs[names].to_numpy(), coords={dim: names}, dims=dim)
+            lhs = lhs + (capacity.sel({dim: names}) * weights).sum()
+
+    if isinstance(lhs, int):
+        return None
+    return m.add_constraints(lhs, "<=", budget - fixed_cost, name=name)
+
+
+def add_capex_budget_constraint(n, m, params):
+    """
+    Adds the global CAPEX budget constraint for all new investments to the model.
+
+    The investments of the extendable generators (Solar, Wind, Biomass) and, if
+    its capacity is optimized, of the hydro plant are limited to `CAPEX_BUDGET`.
+    A fixed hydro plant is a constant investment, moved to the right-hand side.
+
+    Args:
+        n (pypsa.Network): The network the model was created from.
+        m (linopy.Model): The model returned by `n.optimize.create_model()`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+    """
+    add_investment_budget_constraint(n, m, capex_per_mw(params), params['CAPEX_BUDGET'])
+
+
+def solve_network(n, params, solver_name="highs", solver_options=None):
+    """
+    Creates the optimization model, adds the CAPEX budget constraint and solves it.
+
+    Args:
+        n (pypsa.Network): The network built by `build_network`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+
+    Returns:
+        tuple: The (status, condition) returned by the solver.
+    """
+    m = n.optimize.create_model()
+    add_capex_budget_constraint(n, m, params)
+    return n.optimize.solve_model(solver_name=solver_name, solver_options=solver_options or {})
@@ -0,0 +1,161 @@
+# utils/parameter_sweep.py
+
+import contextlib
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils.data_loader import load_model_data
+from utils.model_param import get_model_parameters, compute_optimisation_kpis
+from utils.network_builder import prepare_model_data, build_network, solve_network
+from utils.result_cache import solve_network_cached
+
+# Timeseries data loaded once per worker process by `_init_worker`.
+_worker_data = None
+
+
+def expand_parameter_grid(param_grid):
+    """
+    Expands a grid of parameter values into the list of all scenarios.
+
+    Args:
+        param_grid (dict): Maps a parameter name of `utils/model_param.py` to the
+                           list of values to explore, e.g.
+                           {'CAPEX_BUDGET': [1e5, 2e5], 'number_of_chargers': [0, 2, 4]}.
+
+    Returns:
+        list[dict]: One dictionary of overrides per scenario (cartesian product).
+    """
+    # Fail early (in the parent process) on misspelled parameter names.
+    get_model_parameters(**{name: values[0] for name, values in param_grid.items()})
+
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+
+
+def default_max_workers(threads_per_worker=1):
+    """Returns the number of worker processes that fills the CPUs with `threads_per_worker` each."""
+    return max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+
+def worker_solver_options(threads_per_worker, solver_options=None):
+    """
+    Returns the solver options of a solve running in a worker process: the threads
+    are capped so that the workers do not oversubscribe the CPU, and the solver log
+    is silenced. `solver_options` take precedence.
+    """
+    options = {'threads': threads_per_worker, 'output_flag': False}
+    options.update(solver_options or {})
+    return options
+
+
+def _init_worker(data_path):
+    """Loads the timeseries data once for all the scenarios solved by this worker."""
+    global _worker_data
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_data = load_model_data(data_path)
+
+
+def worker_pool(max_workers, data_path='data/model_timeseries.csv'):
+    """
+    Returns a process pool whose workers load the timeseries data once, for the
+    scenarios submitted with `solve_scenario`.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(data_path,))
+
+
+def solve_scenario(row, overrides, solver_name, solver_options, use_cache=False, transform_data=None):
+    """
+    Builds and solves one scenario in a worker of `worker_pool` and returns its result row.
+
+    Args:
+        row (dict): Identifiers of the scenario, the first columns of the row.
+        overrides (dict): Parameter values, see `get_model_parameters`.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict): Options passed to the solver.
+        use_cache (bool): Use the result cache (see `utils/result_cache.py`).
+        transform_data (callable, optional): Applied to the loaded timeseries before
+                                             they are prepared (must be picklable).
+
+    Returns:
+        dict: The row, the overrides, the solver status and, if the solve succeeded,
+              the KPIs of `compute_optimisation_kpis`. Errors are reported in the row.
+    """
+    row = {**row, **overrides}
+    start = time.perf_counter()
+    try:
+        params = get_model_parameters(**overrides)
+        data = _worker_data if transform_data is None else transform_data(_worker_data)
+        data = prepare_model_data(data, params)
+        if use_cache:
+            n, (status, condition) = solve_network_cached(data, params, solver_name, solver_options)
+        else:
+            n = build_network(data, params)
+            status, condition = solve_network(n, params, solver_name, solver_options)
+    except Exception as e:
+        row.update(status='error', condition=str(e), solve_time_s=time.perf_counter() - start)
+        return row
+
+    row.update(status=status, condition=condition, solve_time_s=time.perf_counter() - start)
+    if status == 'ok':
+        row.update(compute_optimisation_kpis(n, params))
+    return row
+
+
+def run_parameter_sweep(param_grid, data_path='data/model_timeseries.csv', max_workers=None,
+                        threads_per_worker=1, solver_name="highs", solver_options=None, use_cache=False):
+    """
+    Solves every scenario of a parameter grid in parallel, one solve per worker process.
+
+    Args:
+        param_grid (dict): Parameter values to explore, see `expand_parameter_grid`.
+        data_path (str): Path to the model timeseries CSV file.
+        max_workers (int, optional): Number of worker processes. Defaults to the
+                                     number of CPUs divided by `threads_per_worker`.
+        threads_per_worker (int): Maximum number of threads used by each solve.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Extra solver options applied to every scenario.
+        use_cache (bool): Load the scenarios solved before from the result cache
+                          (see `utils/result_cache.py`) and store the new ones.
+
+    Returns:
+        pd.DataFrame: One row per scenario with its parameters, the solver status
+                      and its results (see `compute_optimisation_kpis`).
+    """
+    scenarios = expand_parameter_grid(param_grid)
+    max_workers = max_workers or default_max_workers(threads_per_worker)
+    options = worker_solver_options(threads_per_worker, solver_options)
+
+    print(f"--- Running {len(scenarios)} scenarios on {max_workers} workers "
+          f"({threads_per_worker} thread(s) each) ---")
+
+    rows = []
+    with worker_pool(max_workers, data_path) as executor:
+        futures = [executor.submit(solve_scenario, {'scenario': i}, overrides, solver_name, options, use_cache)
+                   for i, overrides in enumerate(scenarios)]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            print(f"[{len(rows)}/{len(scenarios)}] Scenario {row['scenario']}: {row['status']} "
+                  f"({row['solve_time_s']:.1f} s)")
+
+    return pd.DataFrame(rows).set_index('scenario').sort_index()
+
+
+if __name__ == '__main__':
+    # Example: explore the budget and the number of V2G chargers.
+    # Run from the project root directory: python -m utils.parameter_sweep
+    example_grid = {
+        'CAPEX_BUDGET': [1e5, 1.8e5, 2.5e5, 1e9],
+        'number_of_chargers': [0, 2, 10],
+    }
+    results = run_parameter_sweep(example_grid)
+
+    output_path = 'sweep_results.csv'
+    results.to_csv(output_path)
+    print(f"\nSUCCESS: Sweep results saved to '{output_path}'.")
+    print(results)
@@ -0,0 +1,219 @@
+# utils/pareto_frontier.py
+
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from utils.model_param import compute_optimisation_kpis
+from utils.model_resolve import resolve_model
+from utils.network_builder import build_network, add_capex_budget_constraint, grid_exchange
+from utils.parameter_sweep import worker_solver_options
+
+IMPORT_LIMIT_CONSTRAINT = 'Grid_import_energy_limit'
+
+# Bound of the import constraint when it is not limiting (MWh). Linopy drops
+# constraints with an infinite right-hand side, so it must stay finite.
+UNLIMITED_IMPORT_MWH = 1e9
+
+
+def import_energy_expression(n, m, name='Grid Import'):
+    """
+    Returns the energy bought from the grid over the whole horizon (MWh), as a
+    Linopy expression.
+
+    Args:
+        n (pypsa.Network): The network the model was created from.
+        m (linopy.Model): The model returned by `n.optimize.create_model()`.
+        name (str): Name of the import link (or generator, with the compact grid interface).
+    """
+    component = 'Link' if name in n.links.index else 'Generator'
+    flow = m.variables[f'{component}-p'].sel(name=name)
+    weights = xr.DataArray(n.snapshot_weightings.generators.to_numpy(),
+                           coords={'snapshot': n.snapshots}, dims='snapshot')
+    return (flow * weights).sum()
+
+
+def add_import_limit_constraint(n, m, limit=None, name=IMPORT_LIMIT_CONSTRAINT):
+    """
+    Adds a limit on the energy bought from the grid over the whole horizon.
+
+    Args:
+        n (pypsa.Network): The network the model was created from.
+        m (linopy.Model): The model returned by `n.optimize.create_model()`.
+        limit (float, optional): The limit (MWh). Not limiting by default; change
+                                 it with `set_import_limit`.
+        name (str): Name of the constraint.
+
+    Returns:
+        linopy.Constraint: The constraint.
+    """
+    limit = UNLIMITED_IMPORT_MWH if limit is None else limit
+    return m.add_constraints(import_energy_expression(n, m), "<=", limit, name=name)
+
+
+def set_import_limit(n, limit, name=IMPORT_LIMIT_CONSTRAINT):
+    """
+    Changes the import limit of an existing model in place (only the right-hand
+    side of the constraint is modified).
+
+    Args:
+        n (pypsa.Network): A network whose model (`n.model`) holds the import constraint.
+        limit (float): The new limit (MWh).
+    """
+    n.model.constraints[name].rhs = limit
+
+
+def build_frontier_model(data, params):
+    """
+    Builds the network and the Linopy model with the CAPEX budget and a (not yet
+    limiting) import constraint.
+
+    Returns:
+        pypsa.Network: The network, whose model is `n.model`.
+    """
+    n = build_network(data, params)
+    m = n.optimize.create_model()
+    add_capex_budget_constraint(n, m, params)
+    add_import_limit_constraint(n, m)
+    return n
+
+
+def minimum_import(n, solver_name="highs", solver_options=None):
+    """
+    Returns the smallest energy (MWh) the community can buy from the grid within
+    its CAPEX budget.
+
+    The import energy is minimised instead of the cost, then the cost objective is
+    restored. The results of the network are not updated.
+    """
+    m = n.model
+    cost = m.objective
+    m.objective = import_energy_expression(n, m)
+    try:
+        status, condition = m.solve(solver_name=solver_name, **(solver_options or {}))
+        if status != 'ok':
+            raise RuntimeError(f"Minimum import could not be solved: {status}, {condition}")
+        return float(m.objective.value)
+    finally:
+        m.objective = cost
+
+
+def _frontier_row(n, params, limit, status, condition, solve_time):
+    row = {'import_limit_mwh': limit, 'status': status, 'condition': condition, 'solve_time_s': solve_time}
+    if status == 'ok':
+        kpis = compute_optimisation_kpis(n, params)
+        row['self_sufficiency'] = 1 - kpis['grid_purchase_mwh'] / kpis['demand_mwh']
+        row.update(kpis)
+    return row
+
+
+def solve_frontier_points(n, params, limits, solver_name="highs", solver_options=None, warm_start=False):
+    """
+    Solves an existing frontier model for a series of import limits.
+
+    Each limit is applied by changing the right-hand side of the import constraint.
+    With `warm_start`, every solve starts from the basis of the previous one, so
+    the limits should be given in decreasing (or increasing) order.
+
+    Returns:
+        list[dict]: One row per limit with the solver status and the KPIs.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        basis_path = os.path.join(tmp_dir, 'basis.bas') if warm_start else None
+        for limit in limits:
+            set_import_limit(n, limit)
+            start = time.perf_counter()
+            status, condition = resolve_model(n, solver_name, solver_options, basis_path)
+            rows.append(_frontier_row(n, params, limit, status, condition, time.perf_counter() - start))
+            print(f"Import limit {limit:,.1f} MWh: {status}, {time.perf_counter() - start:.1f} s")
+    return rows
+
+
+def _solve_chunk(data, params, limits, solver_name, solver_options, warm_start):
+    """Builds the frontier model once in a worker and solves a chunk of neighbouring limits."""
+    n = build_frontier_model(data, params)
+    return solve_frontier_points(n, params, limits, solver_name, solver_options, warm_start)
+
+
+def solve_pareto_frontier(data, params, n_points=30, limits=None, solver_name="highs", solver_options=None,
+                          warm_start=False, max_workers=1):
+    """
+    Computes the trade-off between the total annualised cost and the energy bought
+    from the grid (epsilon-constraint method).
+
+    Unless `limits` are given, the model is first solved without import limit
+    (cheapest point) and with the import minimised (most self-sufficient point), and
+    `n_points` limits are spread evenly between the two. The model is built once
+    and each point only changes the bound of the import constraint, optionally
+    warm-started from the neighbouring point.
+
+    Warm starts are off by default: HiGHS skips its presolve when it starts from a
+    basis, which makes the solves of this model several times slower than cold ones.
+
+    With `max_workers` > 1, the limits are split into contiguous chunks solved in
+    parallel, each worker building its own model once.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        n_points (int): Number of points of the frontier.
+        limits (list[float], optional): The import limits to solve (MWh).
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+        warm_start (bool): Whether to warm-start each solve from the basis of the
+                           neighbouring point.
+        max_workers (int): Number of worker processes.
+
+    Returns:
+        pd.DataFrame: One row per import limit with the solver status, the
+                      self-sufficiency and the KPIs of `compute_optimisation_kpis`.
+    """
+    solver_options = solver_options or {}
+    n = build_frontier_model(data, params) if limits is None or max_workers <= 1 else None
+
+    if limits is None:
+        print("Solving the frontier end points...")
+        status, condition = resolve_model(n, solver_name, solver_options)
+        if status != 'ok':
+            raise RuntimeError(f"The model without import limit could not be solved: {status}, {condition}")
+        max_import = float((grid_exchange(n)['purchase'] * n.snapshot_weightings.generators).sum())
+        min_import = minimum_import(n, solver_name, solver_options)
+        # From the cheapest to the most self-sufficient point.
+        limits = np.linspace(max_import, min_import, n_points)
+    limits = [float(limit) for limit in limits]
+
+    if max_workers <= 1:
+        rows = solve_frontier_points(n, params, limits, solver_name, solver_options, warm_start)
+    else:
+        chunks = [list(chunk) for chunk in np.array_split(limits, max_workers) if len(chunk)]
+        options = worker_solver_options(max(1, (os.cpu_count() or 1) // max_workers), solver_options)
+        # The solver has already run in this process: forking it can deadlock the workers.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [executor.submit(_solve_chunk, data, params, chunk, solver_name, options, warm_start)
+                       for chunk in chunks]
+            rows = [row for future in futures for row in future.result()]
+
+    return pd.DataFrame(rows).set_index('import_limit_mwh').sort_index()
+
+
+if __name__ == '__main__':
+    # Example: cost versus self-sufficiency frontier of the default scenario.
+    # Run from the project root directory: python -m utils.pareto_frontier
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.model_ploting import plot_pareto_frontier
+    from utils.network_builder import prepare_model_data
+
+    params = get_model_parameters()
+    data = prepare_model_data(load_model_data(), params)
+    frontier = solve_pareto_frontier(data, params, n_points=10)
+    print(frontier[['status', 'self_sufficiency', 'total_cost_k_eur', 'grid_purchase_mwh']])
+    plot_pareto_frontier(frontier)
@@ -0,0 +1,182 @@
+# utils/result_cache.py
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pypsa
+
+from utils.network_builder import build_network, solve_network
+from utils.telemetry import environment_info
+
+# Solved networks are stored in this directory, one NetCDF file per scenario.
+RESULT_CACHE_DIR = os.path.join('.cache', 'solved_networks')
+
+# Maximum total size of the cache. The least recently used networks are removed beyond it.
+MAX_CACHE_BYTES = 500 * 2**20
+
+# A change in the way the network is built and solved, or in the KPIs computed
+# from it, also changes the results.
+_MODEL_CODE_PATHS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+                     for name in ['network_builder.py', 'model_param.py']]
+
+
+def scenario_key(data, params, solver_name="highs", solver_options=None):
+    """
+    Returns the SHA-256 hash identifying a scenario: the timeseries data, every
+    model parameter, the solver and its options, the model code and the versions
+    of the packages that build and solve it (see `utils.telemetry.PACKAGES`).
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict or Scenario): Model parameters, as returned by `get_model_parameters`.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([str(c) for c in data.columns]).encode())
+    digest.update(json.dumps(dict(params), sort_keys=True, default=str).encode())
+    digest.update(json.dumps([solver_name, solver_options or {}], sort_keys=True, default=str).encode())
+    digest.update(json.dumps(environment_info()['packages'], sort_keys=True).encode())
+    for path in _MODEL_CODE_PATHS:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _network_path(cache_dir, key):
+    return os.path.join(cache_dir, f'{key}.nc')
+
+
+def _info_path(cache_dir, key):
+    return os.path.join(cache_dir, f'{key}.json')
+
+
+def load_cached_network(key, cache_dir=RESULT_CACHE_DIR):
+    """
+    Loads a solved network from the cache.
+
+    Returns:
+        tuple: The network and the (status, condition) of its solve,
+               or None if the scenario is not in the cache.
+    """
+    path, info_path = _network_path(cache_dir, key), _info_path(cache_dir, key)
+    if not (os.path.exists(path) and os.path.exists(info_path)):
+        return None
+
+    try:
+        with open(info_path) as f:
+            info = json.load(f)
+        n = pypsa.Network(path)
+        status, condition = info['status'], info['condition']
+    except Exception:
+        # Corrupt or removed meanwhile: the scenario is solved again and stored anew.
+        return None
+    # Mark the entry as recently used for the eviction.
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(path)
+    return n, (status, condition)
+
+
+def store_network(n, key, status, condition, cache_dir=RESULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Stores a solved network in the cache, then evicts old entries if it grew
+    beyond `max_bytes`.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _network_path(cache_dir, key)
+
+    # Write to temporary files first, so that a reader never sees a partial entry.
+    # Their names are unique: other processes may store the same scenario at once.
+    tmp_paths = []
+    for suffix in ['.nc', '.json']:
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix + '.tmp', prefix=key, dir=cache_dir)
+        os.close(fd)
+        tmp_paths.append(tmp_path)
+    tmp_network, tmp_info = tmp_paths
+    try:
+        n.export_to_netcdf(tmp_network)
+        with open(tmp_info, 'w') as f:
+            json.dump({'status': status, 'condition': condition, 'objective': float(n.objective)}, f)
+        os.replace(tmp_info, _info_path(cache_dir, key))
+        os.replace(tmp_network, path)
+    finally:
+        for tmp_path in tmp_paths:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+
+    evict_cache(cache_dir, max_bytes)
+
+
+def evict_cache(cache_dir=RESULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Removes the least recently used networks until the cache fits in `max_bytes`.
+
+    Returns:
+        int: The number of networks removed.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.nc'):
+            try:
+                stat = os.stat(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                # Removed meanwhile by another process sharing the cache (e.g. a sweep worker)
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name[:-len('.nc')]))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, key in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in [_network_path(cache_dir, key), _info_path(cache_dir, key)]:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(cache_dir=RESULT_CACHE_DIR):
+    """Removes every network from the cache."""
+    return evict_cache(cache_dir, max_bytes=-1)
+
+
+def solve_network_cached(data, params, solver_name="highs", solver_options=None,
+                         cache_dir=RESULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Builds and solves a scenario, or loads its solved network from the cache if
+    exactly the same scenario was solved before.
+
+    Only successful solves are stored.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+        cache_dir (str): Directory of the cache.
+        max_bytes (int): Maximum total size of the cache.
+
+    Returns:
+        tuple: The solved network and the (status, condition) returned by the solver.
+    """
+    key = scenario_key(data, params, solver_name, solver_options)
+    cached = load_cached_network(key, cache_dir)
+    if cached is not None:
+        print(f"Loaded the solved network from the cache ({key[:12]}), optimization skipped.")
+        return cached
+
+    n = build_network(data, params)
+    status, condition = solve_network(n, params, solver_name, solver_options)
+    if status == 'ok':
+        store_network(n, key, status, condition, cache_dir, max_bytes)
+    return n, (status, condition)
@@ -0,0 +1,246 @@
+# utils/rolling_horizon.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import infer_time_step
+from utils.network_builder import build_network, grid_import_bound
+
+# Assets whose capacity is chosen by the planning run and fixed for the dispatch.
+DISPATCH_ASSETS = ['Wind', 'Solar', 'Biomass ORC', 'Hydro Reservoir', 'Electric Car Battery', 'Grid Export']
+
+
+def capacities_from_network(n):
+    """
+    Returns the capacities (p_nom_opt, in MW) chosen by a solved planning network,
+    to be fixed in a dispatch-only run.
+    """
+    capacities = {}
+    for name in DISPATCH_ASSETS:
+        for df in [n.generators, n.storage_units, n.links]:
+            if name in df.index:
+                capacities[name] = df.at[name, 'p_nom_opt']
+    return capacities
+
+
+def build_dispatch_network(data, params, capacities):
+    """
+    Builds the network with fixed capacities, for a dispatch-only optimization.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        capacities (dict): Fixed p_nom (MW) of each asset, e.g. from `capacities_from_network`.
+
+    Returns:
+        pypsa.Network: The network, without any extendable asset or cyclic storage.
+    """
+    n = build_network(data, params)
+    for df in [n.generators, n.storage_units, n.links]:
+        names = df.index.intersection(list(capacities))
+        df.loc[names, 'p_nom'] = [capacities[name] for name in names]
+        df.loc[names, 'p_nom_extendable'] = False
+
+    if 'Grid Import' in n.generators.index:
+        # Compact grid interface: the import bound follows the fixed capacities.
+        n.generators.loc['Grid Import', 'p_nom'] = grid_import_bound(n, params, n.generators.at['Grid Export', 'p_nom'])
+
+    # The state of charge is carried over from one window to the next instead.
+    n.storage_units['cyclic_state_of_charge'] = False
+    return n
+
+
+def _fix_state_of_charge(snapshot, soc):
+    """
+    Returns an `extra_functionality` setting the state of charge of the storage
+    units at `snapshot` to the values of `soc` (dict, MWh by storage unit).
+    """
+    def extra_functionality(n, snapshots):
+        state_of_charge = n.model.variables['StorageUnit-state_of_charge']
+        for name, value in soc.items():
+            if name in n.storage_units.index:
+                n.model.add_constraints(state_of_charge.sel(snapshot=snapshot, name=name) == value,
+                                        name=f'StorageUnit-final_state_of_charge-{name}')
+    return extra_functionality
+
+
+def _solve_segment(data, params, capacities, n_kept, horizon, overlap, initial_soc, final_soc,
+                   solver_name, solver_options):
+    """
+    Solves the first `n_kept` snapshots of `data` in windows of `horizon` snapshots,
+    each with `overlap` snapshots of lookahead. `data` includes the lookahead of the
+    last window. If `final_soc` is given, the state of charge reached at the last
+    kept snapshot is set to it.
+    """
+    n = build_dispatch_network(data, params, capacities)
+    n.storage_units['state_of_charge_initial'] = pd.Series(initial_soc).reindex(n.storage_units.index).fillna(0)
+
+    for start in range(0, n_kept, horizon):
+        stop = min(start + horizon + overlap, len(n.snapshots))
+        if start > 0:
+            # Carry over the state of charge reached at the end of the previous (kept) window
+            n.storage_units['state_of_charge_initial'] = n.storage_units_t.state_of_charge.loc[n.snapshots[start - 1]]
+        extra_functionality = None
+        if final_soc and start + horizon >= n_kept:
+            # Last window: hand over to the next block at the state of charge it starts from.
+            extra_functionality = _fix_state_of_charge(n.snapshots[n_kept - 1], final_soc)
+        status, condition = n.optimize(snapshots=n.snapshots[start:stop], solver_name=solver_name,
+                                       solver_options=solver_options or {},
+                                       extra_functionality=extra_functionality)
+        if status != 'ok':
+            raise RuntimeError(f"Dispatch window starting at {n.snapshots[start]} failed: {condition}")
+
+    # Later windows overwrite the lookahead of the previous ones, so only the kept
+    # snapshots hold the final dispatch.
+    kept = n.snapshots[:n_kept]
+    return {
+        ('generators_t', 'p'): n.generators_t.p.loc[kept],
+        ('storage_units_t', 'p'): n.storage_units_t.p.loc[kept],
+        ('storage_units_t', 'p_dispatch'): n.storage_units_t.p_dispatch.loc[kept],
+        ('storage_units_t', 'p_store'): n.storage_units_t.p_store.loc[kept],
+        ('storage_units_t', 'state_of_charge'): n.storage_units_t.state_of_charge.loc[kept],
+        ('storage_units_t', 'spill'): n.storage_units_t.spill.loc[kept],
+        ('links_t', 'p0'): n.links_t.p0.loc[kept],
+        ('links_t', 'p1'): n.links_t.p1.loc[kept],
+    }
+
+
+def _total_cost(n, params):
+    """
+    Annualized cost of the dispatch, comparable to the objective of the planning
+    run: operational costs plus the capital costs of the assets it could size.
+    """
+    weightings = n.snapshot_weightings.objective
+    operational = 0
+    for c, p in [('Generator', n.generators_t.p), ('Link', n.links_t.p0),
+                 ('StorageUnit', n.storage_units_t.p_dispatch)]:
+        marginal_cost = n.get_switchable_as_dense(c, 'marginal_cost')
+        operational += (marginal_cost * p).mul(weightings, axis=0).sum().sum()
+
+    sized_generators = ['Wind', 'Solar', 'Biomass ORC']
+    capital = (n.generators.capital_cost * n.generators.p_nom)[sized_generators].sum()
+    if not params['IS_HYDRO_FIXED']:
+        capital += n.storage_units.at['Hydro Reservoir', 'capital_cost'] * n.storage_units.at['Hydro Reservoir', 'p_nom']
+    return capital + operational
+
+
+def run_rolling_horizon(data, params, capacities, horizon=168, overlap=24, segments=1, reference_soc=None,
+                        max_workers=None, solver_name="highs", solver_options=None):
+    """
+    Optimizes the dispatch of fixed capacities over the year in overlapping windows.
+
+    Each window covers `horizon` hours plus `overlap` hours of lookahead; only
+    the first `horizon` hours are kept, and the state of charge they reach
+    is the starting point of the next window.
+
+    Consecutive windows depend on each other through the state of charge. To solve
+    in parallel, the year is cut into `segments` independent blocks, each starting
+    from the state of charge of a reference solution (e.g. the planning run) and
+    solved window by window in its own worker process. Each block also ends at the
+    state of charge of the reference solution, where the next block starts (and,
+    for the last block, where the first one started), so that no block can draw
+    on energy stored for the next one.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        capacities (dict): Fixed p_nom (MW) of each asset, e.g. from `capacities_from_network`.
+        horizon (float): Hours kept from each window (168 = one week), a multiple of the
+                         time step of the data.
+        overlap (float): Hours of lookahead added to each window, a multiple of the time
+                         step of the data.
+        segments (int): Number of independent blocks solved in parallel.
+        reference_soc (pd.DataFrame, optional): State of charge of each storage unit
+            (columns) at every snapshot, e.g. `n.storage_units_t.state_of_charge` of the
+            planning run. Required when `segments` > 1.
+        max_workers (int, optional): Number of worker processes (default: `segments`).
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+
+    Returns:
+        tuple:
+            - pypsa.Network: A network holding the fixed capacities and the dispatch of
+                             the whole period, usable with the plot functions.
+            - float: The annualized cost of the dispatch (€), comparable to the objective
+                     of the planning run.
+    """
+    if segments > 1 and reference_soc is None:
+        raise ValueError("Independent segments need the state of charge of a reference solution "
+                         "(reference_soc) at their boundaries.")
+
+    # The windows are given in hours, whatever the time step of the data.
+    step = infer_time_step(data.index)
+    for hours in (horizon, overlap):
+        if not float(hours / step).is_integer():
+            raise ValueError(f"The window lengths ({hours} h) must be multiples of the data time step ({step} h).")
+    horizon, overlap = int(horizon / step), int(overlap / step)
+    if horizon < 1:
+        raise ValueError("The horizon must cover at least one time step.")
+
+    capacities = dict(capacities)
+    # The export limit is derived from the peak demand of the whole period, not of each block.
+    capacities.setdefault('Grid Export', params['GRID_INJECTION_LIMIT'] * data['consumption_mwh'].max())
+
+    # --- 1. Cut the period into blocks of whole windows ---
+    n_windows = int(np.ceil(len(data) / horizon))
+    window_starts = np.array_split(np.arange(n_windows) * horizon, min(segments, n_windows))
+    bounds = [(int(starts[0]), int(min(starts[-1] + horizon, len(data)))) for starts in window_starts]
+
+    tasks = []
+    for start, stop in bounds:
+        if reference_soc is None:
+            initial_soc, final_soc = {}, None
+        else:
+            # The state of charge just before the block; the first block starts from
+            # the end of the reference year (where a cyclic storage also ends).
+            initial_soc = reference_soc.iloc[start - 1].to_dict()
+            final_soc = reference_soc.iloc[stop - 1].to_dict()
+        block = data.iloc[start:min(stop + overlap, len(data))]
+        tasks.append((block, params, capacities, stop - start, horizon, overlap, initial_soc, final_soc,
+                      solver_name, solver_options))
+
+    # --- 2. Solve the blocks ---
+    print(f"Solving {n_windows} dispatch windows in {len(tasks)} block(s)...")
+    if len(tasks) == 1:
+        results = [_solve_segment(*tasks[0])]
+    else:
+        # The planning run usually solved in this process already: forking it with the
+        # solver's threads alive can deadlock the workers, so they are started afresh.
+        with ProcessPoolExecutor(max_workers=max_workers or len(tasks),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(_solve_segment, *zip(*tasks)))
+
+    # --- 3. Assemble the dispatch of the whole period ---
+    n = build_dispatch_network(data, params, capacities)
+    for key in results[0]:
+        component_t, attr = key
+        getattr(n, component_t)[attr] = pd.concat([result[key] for result in results])
+    n.loads_t['p'] = n.loads_t.p_set.copy()
+    for df in [n.generators, n.storage_units, n.links]:
+        df['p_nom_opt'] = df['p_nom']
+
+    return n, _total_cost(n, params)
+
+
+if __name__ == '__main__':
+    # Example: size the system over the full year, then re-run its operation
+    # week by week (one day of lookahead) in 4 parallel blocks.
+    # Run from the project root directory: python -m utils.rolling_horizon
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.network_builder import prepare_model_data, solve_network
+
+    params = get_model_parameters()
+    data = prepare_model_data(load_model_data(), params)
+
+    n_plan = build_network(data, params)
+    solve_network(n_plan, params)
+
+    n_dispatch, dispatch_cost = run_rolling_horizon(data, params, capacities_from_network(n_plan), horizon=168,
+                                                    overlap=24, segments=4,
+                                                    reference_soc=n_plan.storage_units_t.state_of_charge)
+    print(f"\nPlanning run total cost: {n_plan.objective / 1e3:.2f} k€/year")
+    print(f"Rolling-horizon dispatch total cost: {dispatch_cost / 1e3:.2f} k€/year")
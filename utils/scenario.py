@@ -0,0 +1,161 @@
+# utils/scenario.py
+
+import dataclasses
+import os
+from collections.abc import Mapping
+
+from utils import model_param
+
+
+@dataclasses.dataclass(frozen=True)
+class Scenario(Mapping):
+    """
+    The input parameters of one scenario, with the derived values (annualized
+    capital costs, V2G power and storage hours) computed on construction.
+
+    A scenario is immutable and hashable, so it can be used as a dictionary key
+    or cached. It also reads like the dictionary returned by `get_model_parameters`
+    (`scenario['CAPEX_BUDGET']`, `dict(scenario)`), so it can be passed as `params`
+    to `build_network`, `solve_network`, `compute_optimisation_kpis`, etc.
+
+    The defaults are the values of `utils/model_param.py`. Load a scenario from a
+    file with `Scenario.from_file`, and derive variants with `replace`:
+
+        base = Scenario.from_file('scenarios/example.toml')
+        for budget in [1e5, 2e5, 5e5]:
+            n = build_network(data, base.replace(CAPEX_BUDGET=budget))
+    """
+    # --- General System Configuration ---
+    CAPEX_BUDGET: float = model_param.CAPEX_BUDGET
+    ANNUAL_ENERGY_DEMAND: float = model_param.ANNUAL_ENERGY_DEMAND
+
+    # --- Solar and Wind ---
+    CAPEX_SOLAR_MW: float = model_param.CAPEX_SOLAR_MW
+    LIFE_SOLAR: float = model_param.LIFE_SOLAR
+    OPEX_SOLAR_MW_YEAR: float = model_param.OPEX_SOLAR_MW_YEAR
+    CAPEX_WIND_MW: float = model_param.CAPEX_WIND_MW
+    LIFE_WIND: float = model_param.LIFE_WIND
+    OPEX_WIND_MW_YEAR: float = model_param.OPEX_WIND_MW_YEAR
+    WIND_CAPACITY_FACTOR: float = model_param.WIND_CAPACITY_FACTOR
+
+    # --- Biomass ORC ---
+    CAPEX_BIOMASS_MW: float = model_param.CAPEX_BIOMASS_MW
+    OPEX_BIOMASS_MW_YEAR: float = model_param.OPEX_BIOMASS_MW_YEAR
+    LIFE_ORC_Biomass: float = model_param.LIFE_ORC_Biomass
+
+    # --- Hydro Reservoir ---
+    IS_HYDRO_FIXED: bool = model_param.IS_HYDRO_FIXED
+    PUMPING_HYDRO: float = model_param.PUMPING_HYDRO
+    CAPEX_HYDRO_MW: float = model_param.CAPEX_HYDRO_MW
+    LIFE_HYDRO: float = model_param.LIFE_HYDRO
+    OPEX_HYDRO_MW_YEAR: float = model_param.OPEX_HYDRO_MW_YEAR
+    RESERVOIR_CAPACITY_HYDRO: float = model_param.RESERVOIR_CAPACITY_HYDRO
+
+    # --- Electric Car (V2G) ---
+    mean_electric_car_capacity: float = model_param.mean_electric_car_capacity
+    number_of_chargers: int = model_param.number_of_chargers
+    max_power_per_charger: float = model_param.max_power_per_charger
+
+    # --- Grid Interaction ---
+    GRID_INJECTION_LIMIT: float = model_param.GRID_INJECTION_LIMIT
+    COMPACT_GRID_INTERFACE: bool = model_param.COMPACT_GRID_INTERFACE
+
+    # --- Derived values (computed in __post_init__) ---
+    capital_cost_solar: float = dataclasses.field(init=False)
+    capital_cost_wind: float = dataclasses.field(init=False)
+    capital_cost_ORC_Biomass: float = dataclasses.field(init=False)
+    capital_cost_hydro: float = dataclasses.field(init=False)
+    power_electric_car: float = dataclasses.field(init=False)
+    battery_capacity_electric_car_hours: float = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        for field in dataclasses.fields(self):
+            if field.init and not isinstance(getattr(self, field.name), (int, float)):
+                raise TypeError(f"Scenario parameter '{field.name}' must be a number, "
+                                f"got {getattr(self, field.name)!r}")
+
+        power_electric_car = self.number_of_chargers * self.max_power_per_charger
+        derived = {
+            'capital_cost_solar': self.CAPEX_SOLAR_MW / self.LIFE_SOLAR + self.OPEX_SOLAR_MW_YEAR,
+            'capital_cost_wind': self.CAPEX_WIND_MW / self.LIFE_WIND + self.OPEX_WIND_MW_YEAR,
+            'capital_cost_ORC_Biomass': (self.CAPEX_BIOMASS_MW / self.LIFE_ORC_Biomass) + self.OPEX_BIOMASS_MW_YEAR,
+            'capital_cost_hydro': self.CAPEX_HYDRO_MW / self.LIFE_HYDRO + self.OPEX_HYDRO_MW_YEAR,
+            'power_electric_car': power_electric_car,
+            # Without chargers there is no V2G storage at all.
+            'battery_capacity_electric_car_hours': (
+                (self.number_of_chargers * self.mean_electric_car_capacity) / power_electric_car
+                if power_electric_car > 0 else 0),
+        }
+        # The dataclass is frozen: the derived values are set once, here.
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+    # --- Read-only mapping interface, like the `params` dictionaries ---
+    def __getitem__(self, name):
+        if name not in self.__dataclass_fields__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __iter__(self):
+        return iter(self._names())
+
+    def __len__(self):
+        return len(self._names())
+
+    @classmethod
+    def _names(cls):
+        return [field.name for field in dataclasses.fields(cls)]
+
+    @classmethod
+    def input_names(cls):
+        """Names of the parameters that can be set (all but the derived values)."""
+        return [field.name for field in dataclasses.fields(cls) if field.init]
+
+    def replace(self, **overrides):
+        """Returns a copy of the scenario with some parameters changed (derived values recomputed)."""
+        unknown = [name for name in overrides if name not in self.input_names()]
+        if unknown:
+            raise KeyError(f"Unknown model parameter(s): {unknown}")
+        return dataclasses.replace(self, **overrides)
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Creates a scenario from a dictionary of parameters. The parameters that
+        are not given keep their value of `utils/model_param.py`.
+
+        Tables (e.g. `[solar]` in TOML) are flattened, so parameters can be grouped
+        by technology in a scenario file.
+        """
+        flat = {}
+        for name, value in values.items():
+            if isinstance(value, Mapping):
+                flat.update(value)
+            else:
+                flat[name] = value
+        return cls().replace(**flat)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Loads a scenario from a TOML (.toml) or YAML (.yaml, .yml) file.
+
+        YAML files need the optional `pyyaml` package.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.toml':
+            import tomllib
+            with open(path, 'rb') as f:
+                return cls.from_dict(tomllib.load(f))
+        if extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Loading YAML scenarios requires pyyaml: pip install pyyaml") from None
+            with open(path) as f:
+                return cls.from_dict(yaml.safe_load(f) or {})
+        raise ValueError(f"Unsupported scenario file '{path}': use a .toml, .yaml or .yml file.")
+
+    def to_dict(self):
+        """Returns all the parameters (inputs and derived values) as a dictionary."""
+        return dict(self)
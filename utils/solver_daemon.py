@@ -0,0 +1,284 @@
+# utils/solver_daemon.py
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib import request
+
+from utils.model_param import compute_optimisation_kpis
+from utils.network_builder import prepare_model_data, build_network, add_capex_budget_constraint, grid_import_bound
+from utils.scenario import Scenario
+from utils.telemetry import json_default
+
+BUDGET_CONSTRAINT = 'Global_CAPEX_budget_limit'
+EV_STORAGE = 'Electric Car Battery'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Capital cost of each extendable generator, and the parameters it is derived from.
+GENERATOR_COSTS = {
+    'Solar': ('capital_cost_solar', ['CAPEX_SOLAR_MW', 'LIFE_SOLAR', 'OPEX_SOLAR_MW_YEAR']),
+    'Wind': ('capital_cost_wind', ['CAPEX_WIND_MW', 'LIFE_WIND', 'OPEX_WIND_MW_YEAR']),
+    'Biomass ORC': ('capital_cost_ORC_Biomass', ['CAPEX_BIOMASS_MW', 'LIFE_ORC_Biomass', 'OPEX_BIOMASS_MW_YEAR']),
+}
+
+# Parameters that can be changed in the existing model, by group. Changing any
+# other parameter (demand, wind resource, hydro plant, grid interface, ...)
+# rebuilds the network and the model.
+IN_PLACE_PARAMETERS = {
+    # Only the investment costs per MW are coefficients of the budget constraint.
+    'budget': ['CAPEX_BUDGET', 'CAPEX_SOLAR_MW', 'CAPEX_WIND_MW', 'CAPEX_BIOMASS_MW'],
+    'costs': [name for _, names in GENERATOR_COSTS.values() for name in names],
+    'ev_fleet': ['number_of_chargers', 'max_power_per_charger', 'mean_electric_car_capacity'],
+    'grid_export': ['GRID_INJECTION_LIMIT'],
+}
+
+
+def _set_fixed_rhs(m, constraint, name, values):
+    """Sets the right-hand side of the constraint of one asset at every snapshot."""
+    rhs = m.constraints[constraint].rhs.copy()
+    rhs.loc[{'name': name}] = values
+    m.constraints[constraint].rhs = rhs
+
+
+class SolverSession:
+    """
+    Keeps the data, the network and the Linopy model of a scenario in memory and
+    answers what-if queries on it.
+
+    Each query gives parameter changes relative to the base scenario. When only
+    the parameters of `IN_PLACE_PARAMETERS` change, they are applied to the
+    existing model (right-hand sides of the budget, V2G, export and compact import
+    constraints, coefficients of the budget constraint and of the objective) and only the solve
+    is repeated. Other changes rebuild the network and the model from the data in
+    memory.
+
+    Example:
+        session = SolverSession(load_model_data())
+        record = session.query({'CAPEX_BUDGET': 5e5, 'number_of_chargers': 4})
+    """
+
+    def __init__(self, data, scenario=None, solver_name="highs", solver_options=None):
+        """
+        Args:
+            data (pd.DataFrame): Timeseries data as returned by `load_model_data`.
+            scenario (Scenario, optional): The base scenario (default: `utils/model_param.py`).
+            solver_name (str): Name of the solver used by linopy.
+            solver_options (dict, optional): Options passed to the solver.
+        """
+        self.data = data
+        self.base = scenario or Scenario()
+        self.solver_name = solver_name
+        self.solver_options = solver_options or {}
+        self._build(self.base)
+
+    def _build(self, scenario):
+        self.n = build_network(prepare_model_data(self.data, scenario), scenario)
+        m = self.n.optimize.create_model()
+        add_capex_budget_constraint(self.n, m, scenario)
+        # The model was built for `built`; `current` is the scenario applied to it.
+        self.built = self.current = scenario
+        self._base_objective = m.objective.expression
+
+    def _changed(self, scenario):
+        return [name for name in Scenario.input_names() if scenario[name] != self.current[name]]
+
+    def _can_update(self, scenario):
+        in_place = {name for names in IN_PLACE_PARAMETERS.values() for name in names}
+        if scenario['COMPACT_GRID_INTERFACE']:
+            # The import bound of the compact interface depends on the export limit.
+            in_place.discard('GRID_INJECTION_LIMIT')
+        return all(scenario[name] == self.built[name] for name in Scenario.input_names()
+                   if name not in in_place)
+
+    # --- In-place updates, each setting absolute values from the scenario ---
+    def _update_costs(self, scenario):
+        n, m = self.n, self.n.model
+        # From the objective of the built scenario, so that changes do not accumulate.
+        objective = self._base_objective
+        for name, (param, _) in GENERATOR_COSTS.items():
+            n.generators.at[name, 'capital_cost'] = scenario[param]
+            change = scenario[param] - self.built[param]
+            if change:
+                objective = objective + change * m.variables['Generator-p_nom'].sel(name=name)
+        m.objective = objective
+
+    def _update_budget(self, scenario):
+        # The CAPEX per MW are coefficients of the constraint: it is added again.
+        self.n.model.remove_constraints(BUDGET_CONSTRAINT)
+        add_capex_budget_constraint(self.n, self.n.model, scenario)
+
+    def _update_ev_fleet(self, scenario):
+        n, m = self.n, self.n.model
+        p_nom, max_hours = scenario['power_electric_car'], scenario['battery_capacity_electric_car_hours']
+        n.storage_units.loc[EV_STORAGE, ['p_nom', 'max_hours']] = [p_nom, max_hours]
+        p_max_pu = n.get_switchable_as_dense('StorageUnit', 'p_max_pu')[EV_STORAGE].to_numpy()
+        p_min_pu = n.get_switchable_as_dense('StorageUnit', 'p_min_pu')[EV_STORAGE].to_numpy()
+        _set_fixed_rhs(m, 'StorageUnit-fix-p_dispatch-upper', EV_STORAGE, p_nom * p_max_pu)
+        _set_fixed_rhs(m, 'StorageUnit-fix-p_store-upper', EV_STORAGE, -p_nom * p_min_pu)
+        _set_fixed_rhs(m, 'StorageUnit-fix-state_of_charge-upper', EV_STORAGE, p_nom * max_hours)
+
+    def _update_grid_export(self, scenario):
+        n, m = self.n, self.n.model
+        # As in `build_network`: a multiple of the peak consumption.
+        p_nom = scenario['GRID_INJECTION_LIMIT'] * n.loads_t.p_set['Consumption'].max()
+        n.links.at['Grid Export', 'p_nom'] = p_nom
+        p_max_pu = n.get_switchable_as_dense('Link', 'p_max_pu')['Grid Export'].to_numpy()
+        _set_fixed_rhs(m, 'Link-fix-p-upper', 'Grid Export', p_nom * p_max_pu)
+
+    def _update_grid_import(self, scenario):
+        n, m = self.n, self.n.model
+        # Compact grid interface: as in `build_network`, the import bound follows the
+        # charging power of the storage units and the budget of the extendable ones.
+        p_nom = grid_import_bound(n, scenario, n.generators.at['Grid Export', 'p_nom'])
+        n.generators.at['Grid Import', 'p_nom'] = p_nom
+        p_max_pu = n.get_switchable_as_dense('Generator', 'p_max_pu')['Grid Import'].to_numpy()
+        _set_fixed_rhs(m, 'Generator-fix-p-upper', 'Grid Import', p_nom * p_max_pu)
+
+    def apply(self, scenario):
+        """
+        Makes the model represent `scenario`, in place when possible.
+
+        Returns:
+            tuple: ('in_place' or 'rebuild', names of the parameters that changed).
+        """
+        changed = self._changed(scenario)
+        if not self._can_update(scenario):
+            self._build(scenario)
+            return 'rebuild', changed
+
+        updates = {'costs': self._update_costs, 'budget': self._update_budget,
+                   'ev_fleet': self._update_ev_fleet, 'grid_export': self._update_grid_export}
+        for group, update in updates.items():
+            if any(name in changed for name in IN_PLACE_PARAMETERS[group]):
+                update(scenario)
+        if scenario['COMPACT_GRID_INTERFACE'] and changed:
+            self._update_grid_import(scenario)
+        self.current = scenario
+        return 'in_place', changed
+
+    def query(self, overrides=None):
+        """
+        Solves the base scenario with some parameters changed.
+
+        Args:
+            overrides (dict, optional): Parameter values relative to the base scenario,
+                                        e.g. {'CAPEX_BUDGET': 5e5}.
+
+        Returns:
+            dict: The solver status, how the model was updated, the solve time and,
+                  if the solve succeeded, the record of `compute_optimisation_kpis`.
+        """
+        scenario = self.base.replace(**(overrides or {}))
+        start = time.perf_counter()
+        update, changed = self.apply(scenario)
+        update_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status, condition = self.n.optimize.solve_model(solver_name=self.solver_name,
+                                                        solver_options=self.solver_options)
+        result = {'status': status, 'condition': condition, 'update': update, 'changed': changed,
+                  'update_time_s': update_time, 'solve_time_s': time.perf_counter() - start}
+        if status == 'ok':
+            result['kpis'] = compute_optimisation_kpis(self.n, scenario)
+        return result
+
+
+# =============================================================================
+# --- Local HTTP service ---
+# =============================================================================
+def _make_handler(session):
+
+    class SolverRequestHandler(BaseHTTPRequestHandler):
+        """
+        GET /scenario returns the parameters of the base scenario.
+        POST /solve with a JSON object of parameter changes returns the result of
+        `SolverSession.query`.
+        """
+
+        def _send(self, code, body):
+            payload = json.dumps(body, default=json_default).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/scenario':
+                self._send(200, session.base.to_dict())
+            else:
+                self._send(404, {'error': f"Unknown path '{self.path}'"})
+
+        def do_POST(self):
+            if self.path != '/solve':
+                self._send(404, {'error': f"Unknown path '{self.path}'"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                overrides = json.loads(self.rfile.read(length) or b'{}')
+                result = session.query(overrides)
+            except (ValueError, KeyError, TypeError) as e:
+                # Invalid JSON, unknown parameter or value of the wrong type
+                self._send(400, {'error': str(e)})
+                return
+            except Exception as e:
+                # Solver or model error: the client still gets an answer
+                self._send(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            self._send(200, result)
+
+    return SolverRequestHandler
+
+
+def serve(session, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Answers queries on a local HTTP port until interrupted.
+
+    The server handles one request at a time: the queries share the model of the
+    session.
+    """
+    server = HTTPServer((host, port), _make_handler(session))
+    print(f"Solver daemon listening on http://{host}:{port} (POST /solve, GET /scenario)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def query_daemon(overrides=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+    """
+    Sends a query to a running daemon.
+
+    Args:
+        overrides (dict, optional): Parameter values relative to the base scenario.
+
+    Returns:
+        dict: The result of `SolverSession.query`.
+    """
+    req = request.Request(f"http://{host}:{port}/solve", data=json.dumps(overrides or {}).encode(),
+                          headers={'Content-Type': 'application/json'}, method='POST')
+    with request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+if __name__ == '__main__':
+    # Run from the project root directory: python -m utils.solver_daemon
+    from utils.data_loader import load_model_data
+    from utils.solver_profiles import get_solver_options
+
+    parser = argparse.ArgumentParser(description="Keep a model in memory and answer what-if queries over HTTP.")
+    parser.add_argument('--scenario', help="TOML/YAML base scenario file (default: utils/model_param.py)")
+    parser.add_argument('--data', default='data/model_timeseries.csv', help="model timeseries CSV file")
+    parser.add_argument('--profile', default=None, help="solver profile (default: SOLVER_PROFILE)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    base = Scenario.from_file(args.scenario) if args.scenario else Scenario()
+    session = SolverSession(load_model_data(args.data), base, solver_options=get_solver_options(args.profile))
+    serve(session, args.host, args.port)
@@ -0,0 +1,176 @@
+# utils/solver_profiles.py
+
+import argparse
+import datetime
+import json
+import os
+import time
+
+import pandas as pd
+
+from utils.model_param import SOLVER_PROFILE
+from utils.network_builder import build_network, add_capex_budget_constraint
+from utils.telemetry import environment_info, solver_statistics
+
+# Named sets of HiGHS options (see https://ergo-code.github.io/HiGHS/stable/options/definitions/).
+# The number of threads and the time limit are chosen per run, see `get_solver_options`.
+SOLVER_PROFILES = {
+    # HiGHS chooses the algorithm (dual simplex for this model)
+    'default': {},
+    'simplex': {'solver': 'simplex'},
+    'ipm': {'solver': 'ipm', 'run_crossover': 'on'},
+    # No crossover: the solution is not a vertex, but it is often several times
+    # faster on large (multi-year) models.
+    'ipm_no_crossover': {'solver': 'ipm', 'run_crossover': 'off'},
+    # As above with looser tolerances, for quick exploratory runs.
+    'ipm_fast': {'solver': 'ipm', 'run_crossover': 'off', 'ipm_optimality_tolerance': 1e-6,
+                 'primal_feasibility_tolerance': 1e-6, 'dual_feasibility_tolerance': 1e-6},
+    'simplex_no_presolve': {'solver': 'simplex', 'presolve': 'off'},
+}
+
+# Result of the last auto-tune, used by the 'tuned' profile.
+TUNED_PROFILE_PATH = 'solver_profile_tuning.json'
+
+
+def tuned_profile(path=TUNED_PROFILE_PATH):
+    """Returns the name of the fastest profile recorded by `autotune_solver_profiles`, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['best_profile']
+
+
+def get_solver_options(profile=None, threads=None, time_limit=None, **options):
+    """
+    Returns the solver options of a profile.
+
+    Args:
+        profile (str, optional): A name of `SOLVER_PROFILES`, or 'tuned' for the fastest
+                                 profile recorded by the last auto-tune (falls back to
+                                 'default' if there is none). Defaults to `SOLVER_PROFILE`
+                                 in `utils/model_param.py`.
+        threads (int, optional): Maximum number of threads of the solver.
+        time_limit (float, optional): Time limit of the solve in seconds.
+        **options: Extra solver options, applied last.
+
+    Returns:
+        dict: The options, to pass as `solver_options` to the solve functions.
+    """
+    if profile is None:
+        profile = SOLVER_PROFILE
+    if profile == 'tuned':
+        profile = tuned_profile() or 'default'
+    if profile not in SOLVER_PROFILES:
+        raise KeyError(f"Unknown solver profile '{profile}'. Available: {list(SOLVER_PROFILES)} or 'tuned'")
+
+    solver_options = dict(SOLVER_PROFILES[profile])
+    if threads is not None:
+        solver_options['threads'] = threads
+    if time_limit is not None:
+        solver_options['time_limit'] = time_limit
+    solver_options.update(options)
+    return solver_options
+
+
+def autotune_solver_profiles(data, params, profiles=None, repeat=1, threads=None, time_limit=None,
+                             max_objective_gap=1e-6, output_path=TUNED_PROFILE_PATH):
+    """
+    Solves a scenario with each solver profile and records the fastest one.
+
+    The network and the Linopy model are built once and solved again with each
+    profile. Only profiles that solve to optimality with an objective within
+    `max_objective_gap` (relative) of the best one are candidates.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        profiles (list[str], optional): Profiles to compare (default: all of them).
+        repeat (int): Number of solves of each profile. The fastest time is kept.
+        threads (int, optional): Maximum number of threads of the solver.
+        time_limit (float, optional): Time limit of each solve in seconds.
+        max_objective_gap (float): Largest relative difference with the best objective.
+        output_path (str, optional): JSON file where the result is saved (not saved if None).
+
+    Returns:
+        pd.DataFrame: One row per profile with its status, time, objective and
+                      solver statistics, the fastest first.
+    """
+    n = build_network(data, params)
+    m = n.optimize.create_model()
+    add_capex_budget_constraint(n, m, params)
+
+    rows = []
+    for profile in profiles or list(SOLVER_PROFILES):
+        options = get_solver_options(profile, threads, time_limit, output_flag=False)
+        times = []
+        for i in range(repeat):
+            print(f"Solving with the '{profile}' solver profile (run {i + 1}/{repeat})...")
+            start = time.perf_counter()
+            status, condition = n.optimize.solve_model(solver_name="highs", solver_options=options)
+            times.append(time.perf_counter() - start)
+        stats = solver_statistics(m)
+        rows.append({'profile': profile, 'status': status, 'condition': condition, 'solve_time_s': min(times),
+                     'objective': n.objective if status == 'ok' else None,
+                     'simplex_iterations': stats.get('simplex_iteration_count'),
+                     'ipm_iterations': stats.get('ipm_iteration_count')})
+
+    results = pd.DataFrame(rows).set_index('profile')
+    solved = results['status'] == 'ok'
+    if not solved.any():
+        raise RuntimeError("No solver profile solved the scenario.")
+    best_objective = results.loc[solved, 'objective'].min()
+    gap = (results['objective'] - best_objective).abs() / max(abs(best_objective), 1.0)
+    results['objective_gap'] = gap
+    results['valid'] = solved & (gap <= max_objective_gap)
+    results = results.sort_values(['valid', 'solve_time_s'], ascending=[False, True])
+    best = results.index[0]
+
+    if output_path is not None:
+        record = {
+            'best_profile': best,
+            'solver_options': get_solver_options(best, threads, time_limit),
+            'tuned_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'snapshots': len(n.snapshots),
+            'environment': environment_info(),
+            'results': results.reset_index().to_dict(orient='records'),
+        }
+        with open(output_path, 'w') as f:
+            json.dump(record, f, indent=2)
+        print(f"Fastest solver profile '{best}' saved to '{output_path}'.")
+    return results
+
+
+def _parse_override(text):
+    # "NAME=VALUE", the value being read as JSON when possible (numbers, true/false)
+    name, _, value = text.partition('=')
+    try:
+        return name, json.loads(value)
+    except json.JSONDecodeError:
+        return name, value
+
+
+if __name__ == '__main__':
+    # Auto-tune: compare the solver profiles on a scenario and record the fastest.
+    # Run from the project root directory: python -m utils.solver_profiles
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.network_builder import prepare_model_data
+
+    parser = argparse.ArgumentParser(description="Find the fastest HiGHS solver profile for a scenario.")
+    parser.add_argument('--profiles', nargs='+', default=None,
+                        help=f"profiles to compare among {list(SOLVER_PROFILES)} (default: all)")
+    parser.add_argument('--set', nargs='+', default=[], metavar='NAME=VALUE',
+                        help="scenario parameters overriding utils/model_param.py, e.g. CAPEX_BUDGET=2e5")
+    parser.add_argument('--data', default='data/model_timeseries.csv', help="model timeseries CSV file")
+    parser.add_argument('--repeat', type=int, default=1, help="solves of each profile, the fastest is kept")
+    parser.add_argument('--threads', type=int, default=None, help="maximum number of solver threads")
+    parser.add_argument('--time-limit', type=float, default=None, help="time limit of each solve (s)")
+    parser.add_argument('--output', default=TUNED_PROFILE_PATH, help="JSON file of the result")
+    args = parser.parse_args()
+
+    params = get_model_parameters(**dict(_parse_override(text) for text in args.set))
+    data = prepare_model_data(load_model_data(args.data), params)
+    results = autotune_solver_profiles(data, params, args.profiles, args.repeat, args.threads,
+                                       args.time_limit, output_path=args.output)
+    print("\n--- Solver profiles, fastest first ---")
+    print(results.round(3))
@@ -0,0 +1,179 @@
+# utils/telemetry.py
+
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+from importlib import metadata
+
+# Each run appends one JSON record (one line) to this file.
+TELEMETRY_PATH = 'telemetry_runs.jsonl'
+
+# Packages whose version can change the timings or the results.
+PACKAGES = ['pypsa', 'linopy', 'highspy', 'pandas', 'numpy', 'xarray']
+
+# HiGHS statistics kept in the record (see `highspy.Highs.getInfo`).
+HIGHS_INFO_FIELDS = [
+    'simplex_iteration_count', 'ipm_iteration_count', 'crossover_iteration_count',
+    'objective_function_value', 'max_primal_infeasibility', 'max_dual_infeasibility',
+]
+
+
+def environment_info():
+    """Returns the versions and the machine a run or benchmark ran with."""
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+    }
+
+
+def new_run_record(name, params=None):
+    """
+    Starts the telemetry record of a run.
+
+    Args:
+        name (str): Name of the script or study.
+        params (dict or Scenario, optional): Model parameters of the run.
+
+    Returns:
+        dict: The record, completed by `measure_phase`, `model_statistics` and
+              `solver_statistics`, and saved by `write_run_record`.
+    """
+    return {
+        'run_id': uuid.uuid4().hex,
+        'name': name,
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment_info(),
+        'params': dict(params or {}),
+        'phases': {},
+        'model': {},
+        'solver': {},
+    }
+
+
+def _reset_peak_rss():
+    """
+    Resets the peak resident memory of the process, so that the next reading
+    gives the peak of the current phase only. Only possible on Linux.
+    """
+    with contextlib.suppress(OSError):
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+
+
+def _peak_rss_mb():
+    """Returns the peak resident memory of the process (MB), or None if unknown."""
+    # Linux: peak since the last `_reset_peak_rss`
+    with contextlib.suppress(OSError):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        # Peak since the start of the process: kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, 'peak_wset', memory.rss) / 1024**2
+
+
+@contextlib.contextmanager
+def measure_phase(record, name):
+    """
+    Measures the wall time, CPU time and peak resident memory of a phase.
+
+    Usage:
+        with measure_phase(record, 'solve'):
+            n.optimize.solve_model(solver_name="highs")
+    """
+    _reset_peak_rss()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        record['phases'][name] = {
+            'wall_s': time.perf_counter() - wall_start,
+            'cpu_s': time.process_time() - cpu_start,
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+
+
+def model_statistics(m):
+    """Returns the size of a Linopy model: variables, constraints and nonzeros."""
+    return {
+        'variables': int(m.nvars),
+        'constraints': int(m.ncons),
+        'nonzeros': int(m.matrices.A.nnz),
+    }
+
+
+def solver_statistics(m):
+    """
+    Returns the statistics of the last solve of a Linopy model: status and,
+    for HiGHS, run time, iteration counts and residual infeasibilities.
+    """
+    stats = {
+        'solver': getattr(m, 'solver_name', None),
+        'status': m.status,
+        'termination_condition': m.termination_condition,
+    }
+
+    highs = getattr(m, 'solver_model', None)
+    if highs is not None and hasattr(highs, 'getInfo'):
+        info = highs.getInfo()
+        stats['run_time_s'] = highs.getRunTime()
+        stats['model_status'] = highs.modelStatusToString(highs.getModelStatus())
+        stats.update({field: getattr(info, field, None) for field in HIGHS_INFO_FIELDS})
+    return stats
+
+
+def json_default(value):
+    """`default` of `json.dumps` for numpy scalars and other objects that json does not know."""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def write_run_record(record, path=TELEMETRY_PATH):
+    """Appends the record of a run to the telemetry file, as one line of JSON."""
+    record['finished_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, default=json_default) + '\n')
+
+
+def load_run_records(path=TELEMETRY_PATH):
+    """
+    Loads the records of all the runs in a telemetry file.
+
+    Returns:
+        pd.DataFrame: One row per run, with the phase, model and solver statistics
+                      as flat columns (e.g. 'phases.solve.wall_s').
+    """
+    import pandas as pd
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return pd.json_normalize(records)
@@ -0,0 +1,207 @@
+# utils/time_aggregation.py
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import infer_time_step
+from utils.network_builder import build_network, add_capex_budget_constraint, keep_export_limit, solution_summary
+
+# Length of the supported representative periods, in hours.
+PERIOD_HOURS = {'day': 24, 'week': 168}
+
+# Columns used to compare the periods of the year when clustering.
+CLUSTERING_COLUMNS = [
+    'wind_capacity_factor',
+    'solar_capacity_factor',
+    'consumption_mwh',
+    'hydro_inflow_kwh',
+    'grid_price_eur_per_mwh'
+]
+
+
+def _period_snapshots(index, period):
+    """Number of snapshots of a representative period at the time step of the index."""
+    return int(round(PERIOD_HOURS[period] / infer_time_step(index)))
+
+
+def _kmeans(features, n_clusters, seed=0, max_iter=300):
+    """Plain k-means with k-means++ initialisation. Returns the cluster label of each row."""
+    rng = np.random.default_rng(seed)
+
+    # k-means++: spread the initial centers over the data
+    centers = [features[rng.integers(len(features))]]
+    for _ in range(1, n_clusters):
+        dist = ((features[:, None, :] - np.array(centers)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        probabilities = dist / dist.sum() if dist.sum() > 0 else None
+        centers.append(features[rng.choice(len(features), p=probabilities)])
+    centers = np.array(centers)
+
+    for _ in range(max_iter):
+        dist = ((features[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = dist.argmin(axis=1)
+        new_centers = np.array([features[labels == k].mean(axis=0) if np.any(labels == k) else centers[k]
+                                for k in range(n_clusters)])
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+
+    return labels, centers
+
+
+def cluster_representative_periods(data, n_periods, period='day', seed=0):
+    """
+    Reduces the timeseries data to a few representative days or weeks.
+
+    The periods of the year are grouped with k-means on their normalized profiles,
+    and each group is represented by its medoid, i.e. the real period closest to
+    the center of the group. The representative periods are kept in chronological order.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        n_periods (int): Number of representative periods.
+        period (str): 'day' or 'week'.
+        seed (int): Seed of the k-means initialisation.
+
+    Returns:
+        tuple:
+            - pd.DataFrame: The rows of the representative periods.
+            - pd.Series: The weighting of each of these snapshots, i.e. the number
+                         of hours of the year it stands for.
+    """
+    if period not in PERIOD_HOURS:
+        raise ValueError(f"Unknown period '{period}'. Choose one of {list(PERIOD_HOURS)}.")
+    step = infer_time_step(data.index)
+    length = _period_snapshots(data.index, period)
+    n_full = len(data) // length
+    if not 0 < n_periods <= n_full:
+        raise ValueError(f"n_periods must be between 1 and {n_full} for period '{period}'.")
+
+    # Normalize each column to [0, 1] so that they weigh equally in the distance.
+    values = data[CLUSTERING_COLUMNS].iloc[:n_full * length]
+    value_range = (values.max() - values.min()).replace(0, 1)
+    normalized = (values - values.min()) / value_range
+    # One row per period: the profiles of all columns side by side.
+    features = normalized.to_numpy().reshape(n_full, length * len(CLUSTERING_COLUMNS))
+
+    labels, centers = _kmeans(features, n_periods, seed=seed)
+
+    medoids, counts = [], []
+    for k in np.unique(labels):
+        members = np.flatnonzero(labels == k)
+        dist = ((features[members] - centers[k]) ** 2).sum(axis=1)
+        medoids.append(members[dist.argmin()])
+        counts.append(len(members))
+
+    order = np.argsort(medoids)
+    # The trailing snapshots that do not fill a whole period are spread over all periods.
+    scale = len(data) / (n_full * length)
+
+    rows = np.concatenate([np.arange(medoids[i] * length, (medoids[i] + 1) * length) for i in order])
+    aggregated = data.iloc[rows]
+    weightings = pd.Series(np.repeat([counts[i] * scale * step for i in order], length), index=aggregated.index)
+
+    return aggregated, weightings
+
+
+def apply_representative_weightings(n, weightings):
+    """
+    Sets the snapshot weightings of a network built on representative periods.
+
+    Costs and energies are scaled by the number of hours each snapshot stands for,
+    while the storage balance keeps the time step of the data.
+    """
+    n.snapshot_weightings.loc[:, 'objective'] = weightings
+    n.snapshot_weightings.loc[:, 'generators'] = weightings
+    n.snapshot_weightings.loc[:, 'stores'] = infer_time_step(n.snapshots)
+
+
+def add_representative_period_constraints(n, m, period='day'):
+    """
+    Makes the storage units cyclic within every representative period.
+
+    The state of charge at the end of each period is set equal to the one at the
+    end of the first period. Combined with `cyclic_state_of_charge`, every period
+    then starts and ends at the same level, so repeating it as many times as its
+    weighting does not create or destroy stored energy.
+    """
+    length = _period_snapshots(n.snapshots, period)
+    period_ends = n.snapshots[length - 1::length]
+    if len(period_ends) < 2:
+        return
+
+    soc = m.variables['StorageUnit-state_of_charge']
+    lhs = soc.sel(snapshot=period_ends[1:]) - soc.sel(snapshot=period_ends[0])
+    m.add_constraints(lhs, "==", 0, name="StorageUnit-representative_period_cyclic")
+
+
+def solve_representative_periods(data, params, n_periods, period='day', solver_name="highs",
+                                 solver_options=None, seed=0):
+    """
+    Builds and solves the model on representative periods instead of the full year.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        n_periods (int): Number of representative periods.
+        period (str): 'day' or 'week'.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+        seed (int): Seed of the clustering.
+
+    Returns:
+        tuple: The solved network and the (status, condition) returned by the solver.
+    """
+    aggregated, weightings = cluster_representative_periods(data, n_periods, period, seed)
+
+    n = build_network(aggregated, keep_export_limit(params, data, aggregated))
+    apply_representative_weightings(n, weightings)
+    # Each typical period is repeated, so the EV battery must also end where it started.
+    n.storage_units.loc['Electric Car Battery', 'cyclic_state_of_charge'] = True
+
+    m = n.optimize.create_model()
+    add_capex_budget_constraint(n, m, params)
+    add_representative_period_constraints(n, m, period)
+    status, condition = n.optimize.solve_model(solver_name=solver_name, solver_options=solver_options or {})
+    return n, (status, condition)
+
+
+def compare_with_full_year(n_aggregated, n_full):
+    """
+    Reports the error of a representative-period solution against the full-year one.
+
+    Args:
+        n_aggregated (pypsa.Network): Network solved by `solve_representative_periods`.
+        n_full (pypsa.Network): The same scenario solved over the full year.
+
+    Returns:
+        pd.DataFrame: For each result, the full-year value, the aggregated value
+                      and the relative error (%).
+    """
+    report = pd.DataFrame({
+        'full_year': pd.Series(solution_summary(n_full)),
+        'aggregated': pd.Series(solution_summary(n_aggregated)),
+    })
+    report['relative_error_%'] = (
+        100 * (report['aggregated'] - report['full_year']) / report['full_year'].abs().replace(0, np.nan))
+    return report
+
+
+if __name__ == '__main__':
+    # Example: 12 typical days against the full year.
+    # Run from the project root directory: python -m utils.time_aggregation
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.network_builder import prepare_model_data, solve_network
+
+    params = get_model_parameters()
+    data = prepare_model_data(load_model_data(), params)
+
+    print("Solving the full year...")
+    n_full = build_network(data, params)
+    solve_network(n_full, params)
+
+    print("Solving 12 representative days...")
+    n_agg, _ = solve_representative_periods(data, params, n_periods=12, period='day')
+
+    print("\n--- Representative days vs. full year ---")
+    print(compare_with_full_year(n_agg, n_full).round(3))
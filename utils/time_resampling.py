@@ -0,0 +1,186 @@
+# utils/time_resampling.py
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import infer_time_step
+from utils.network_builder import build_network, add_capex_budget_constraint, keep_export_limit
+
+
+def _step_hours(index):
+    """Returns the time step of a regular timeseries index, in hours."""
+    step = infer_time_step(index)
+    if ((index[1:] - index[:-1]) != pd.Timedelta(hours=step)).any():
+        raise ValueError("The timeseries must have a regular time step to be resampled.")
+    return step
+
+
+def _aggregate(data, groups, step_hours):
+    """
+    Averages the rows of each group of consecutive snapshots.
+
+    All the columns are mean powers (capacity factors, kWh or MWh per hour) or
+    prices, so the mean over a block times its length keeps the energies, and
+    the mean price is the cost of a constant flow over the block.
+    """
+    grouped = data.groupby(groups, sort=False)
+    aggregated = grouped.mean()
+    aggregated.index = data.index.to_series().groupby(groups, sort=False).first().rename(data.index.name)
+    weightings = pd.Series(grouped.size().to_numpy() * step_hours, index=aggregated.index)
+    return aggregated, weightings
+
+
+def resample_timeseries(data, hours):
+    """
+    Converts the timeseries data to a coarser, fixed time step (e.g. 2, 3 or 6 hours).
+
+    Every block of consecutive snapshots is replaced by its first timestamp and
+    the mean of its values. A last, incomplete block keeps the hours it covers.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        hours (float): The new time step, a multiple of the time step of the data.
+
+    Returns:
+        tuple:
+            - pd.DataFrame: The resampled data.
+            - pd.Series: The weighting of each snapshot, i.e. the number of hours it lasts.
+    """
+    step = _step_hours(data.index)
+    steps_per_block = hours / step
+    if steps_per_block < 1 or not float(steps_per_block).is_integer():
+        raise ValueError(f"The new time step ({hours} h) must be a multiple of the data time step ({step} h).")
+    groups = np.arange(len(data)) // int(steps_per_block)
+    return _aggregate(data, groups, step)
+
+
+def net_load(data):
+    """
+    Returns the consumption minus the production of a wind and solar fleet sized
+    so that each technology produces half of the annual consumption (MWh per step).
+
+    The capacities are not known before solving: this proxy only locates the
+    hours where the community is short of (or long on) renewable energy.
+    """
+    consumption = data['consumption_mwh']
+    renewable = 0.5 * consumption.sum() * (data['wind_capacity_factor'] / data['wind_capacity_factor'].sum()
+                                           + data['solar_capacity_factor'] / data['solar_capacity_factor'].sum())
+    return consumption - renewable
+
+
+def variable_resolution(data, max_hours=3, peak_hours=1, peak_quantile=0.95, margin_hours=1):
+    """
+    Converts the timeseries data to a variable time step: fine around the price
+    and net-load peaks, coarse elsewhere.
+
+    A snapshot is a peak when its grid price or its net load (see `net_load`) is
+    above the `peak_quantile` of the year. The peaks and the `margin_hours` around
+    them are aggregated into steps of `peak_hours`; the other hours into steps of
+    up to `max_hours`.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        max_hours (float): Time step away from the peaks, a multiple of the data time step.
+        peak_hours (float): Time step around the peaks, a multiple of the data time step.
+        peak_quantile (float): Quantile of the price and of the net load above which
+                               a snapshot is a peak.
+        margin_hours (float): Hours before and after each peak kept at the fine step.
+
+    Returns:
+        tuple:
+            - pd.DataFrame: The resampled data.
+            - pd.Series: The weighting of each snapshot, i.e. the number of hours it lasts.
+    """
+    step = _step_hours(data.index)
+    for hours in (max_hours, peak_hours):
+        if hours < step or not float(hours / step).is_integer():
+            raise ValueError(f"The time steps ({hours} h) must be multiples of the data time step ({step} h).")
+
+    price = data['grid_price_eur_per_mwh']
+    load = net_load(data)
+    peak = (price >= price.quantile(peak_quantile)) | (load >= load.quantile(peak_quantile))
+    margin = int(round(margin_hours / step))
+    fine = peak.astype(float).rolling(2 * margin + 1, center=True, min_periods=1).max().to_numpy() > 0
+
+    # Runs of consecutive fine (or coarse) snapshots, cut into blocks of the step of the run.
+    run = np.concatenate([[0], np.cumsum(fine[1:] != fine[:-1])])
+    position = pd.Series(run).groupby(run).cumcount().to_numpy()
+    steps_per_block = np.where(fine, int(peak_hours / step), int(max_hours / step))
+    groups = np.cumsum(position % steps_per_block == 0)
+    return _aggregate(data, groups, step)
+
+
+def apply_resampled_weightings(n, weightings):
+    """
+    Sets the snapshot weightings of a network built on resampled data.
+
+    Unlike representative periods, the snapshots follow each other: costs,
+    energies and the storage balance all use the length of each snapshot.
+    """
+    n.snapshot_weightings.loc[:, 'objective'] = weightings
+    n.snapshot_weightings.loc[:, 'generators'] = weightings
+    n.snapshot_weightings.loc[:, 'stores'] = weightings
+
+
+def solve_resampled(data, params, hours=None, solver_name="highs", solver_options=None, **variable_options):
+    """
+    Builds and solves the model at a coarser resolution than the data.
+
+    Args:
+        data (pd.DataFrame): Timeseries data prepared by `prepare_model_data`.
+        params (dict): Model parameters, as returned by `get_model_parameters`.
+        hours (float, optional): Fixed time step (see `resample_timeseries`). If None,
+                                 the variable resolution of `variable_resolution` is
+                                 used, with `variable_options` as its arguments.
+        solver_name (str): Name of the solver used by linopy.
+        solver_options (dict, optional): Options passed to the solver.
+
+    Returns:
+        tuple: The solved network and the (status, condition) returned by the solver.
+    """
+    if hours is not None:
+        resampled, weightings = resample_timeseries(data, hours)
+    else:
+        resampled, weightings = variable_resolution(data, **variable_options)
+
+    n = build_network(resampled, keep_export_limit(params, data, resampled))
+    apply_resampled_weightings(n, weightings)
+
+    m = n.optimize.create_model()
+    add_capex_budget_constraint(n, m, params)
+    status, condition = n.optimize.solve_model(solver_name=solver_name, solver_options=solver_options or {})
+    return n, (status, condition)
+
+
+if __name__ == '__main__':
+    # Example: fixed and variable resolutions against the full year.
+    # Run from the project root directory: python -m utils.time_resampling
+    import time
+
+    from utils.data_loader import load_model_data
+    from utils.model_param import get_model_parameters
+    from utils.network_builder import prepare_model_data, solve_network
+    from utils.time_aggregation import compare_with_full_year
+
+    params = get_model_parameters()
+    data = prepare_model_data(load_model_data(), params)
+
+    print("Solving the full year...")
+    start = time.perf_counter()
+    n_full = build_network(data, params)
+    solve_network(n_full, params)
+    times = {'1 h': time.perf_counter() - start}
+
+    reports = {}
+    for label, options in [('3 h', {'hours': 3}), ('6 h', {'hours': 6}), ('variable', {})]:
+        print(f"Solving at {label} resolution...")
+        start = time.perf_counter()
+        n_resampled, _ = solve_resampled(data, params, **options)
+        times[label] = time.perf_counter() - start
+        reports[label] = compare_with_full_year(n_resampled, n_full)['relative_error_%']
+        print(f"{len(n_resampled.snapshots)} snapshots")
+
+    print("\n--- Relative error against the full year (%) ---")
+    print(pd.DataFrame(reports).round(2))
+    print("\n--- Build and solve time (s) ---")
+    print(pd.Series(times).round(1))